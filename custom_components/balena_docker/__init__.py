@@ -1,39 +1,61 @@
 """Integration for Balena Docker containers."""
 
-import os
+import asyncio
+from datetime import timedelta
 import logging
-import aiohttp
+import time
 import voluptuous as vol
 from typing import Any
 
 from homeassistant.helpers.typing import ConfigType
 
-from homeassistant.core import HomeAssistant, ServiceCall, callback
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.helpers.entity import Entity
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import (
+    HomeAssistantError,
+    ServiceValidationError,
+    Unauthorized,
+)
 from homeassistant.helpers.service import async_register_admin_service
-from homeassistant.helpers.entity_component import EntityComponent
-from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import config_validation as cv, entity_registry as er
+from homeassistant.helpers.importlib import async_import_module
 from homeassistant.components import websocket_api
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 
 
-from .const import DOMAIN, DATA_BALENA
-from .coordinator import BalenaSupervisorApiClient, BalenaSupervisorStateCoordinator
+from .const import DOMAIN, DATA_BALENA, APPLICATION_ACTIONS, CONTROL_ACTIONS
+from .coordinator import (
+    BalenaSupervisorApiClient,
+    BalenaSupervisorStateCoordinator,
+    CircuitBreaker,
+    InvalidApiKey,
+    create_snapshot_store,
+    get_supervisor_address,
+)
 from .types import (
+    DEFAULT_CONFIG_ENTRY_OPTIONS,
     BalenaDockerConfigEntry,
     ConfigEntryRuntimeData,
     ConfigEntryData,
     HassData,
 )
-from .frontend import load_js_modules, unload_js_modules
+from .metrics import ApiMetrics
+from .logs import BalenaLogStream, JournalLogEntry
+from .resources import BalenaResourceCoordinator, async_create_engine_client
+from .session import (
+    ConnectionPoolStats,
+    async_close_session_on_unload,
+    create_supervisor_session,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
-# TODO: use helper.update_coordinator to merge async_get_clientsession requests
-# TODO: what is the request timeout?
-
 
 @websocket_api.require_admin
 @websocket_api.async_response
@@ -41,9 +63,7 @@ _LOGGER = logging.getLogger(__name__)
     {
         vol.Required("type"): "balena_docker/control_container",
         vol.Required("entity_id"): cv.strict_entity_id,
-        vol.Required("action"): vol.In(
-            ["start-service", "stop-service", "restart-service"]
-        ),
+        vol.Required("action"): vol.In(CONTROL_ACTIONS),
     }
 )
 async def handle_container_service(
@@ -60,9 +80,169 @@ async def handle_container_service(
     connection.send_result(msg["id"], {"result": "ok"})
 
 
+@websocket_api.require_admin
+@websocket_api.async_response
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "balena_docker/control_application",
+        vol.Required("entity_id"): cv.strict_entity_id,
+        vol.Required("action"): vol.In(APPLICATION_ACTIONS),
+    }
+)
+async def handle_application_action(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Handle restart/purge for the whole application of a device entity."""
+    entity = hass.data[DATA_BALENA].get_entity(msg["entity_id"])
+
+    await entity.async_control_application(msg["action"])
+
+    connection.send_result(msg["id"], {"result": "ok"})
+
+
+@websocket_api.require_admin
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "balena_docker/subscribe_logs",
+        vol.Required("entity_id"): cv.strict_entity_id,
+    }
+)
+@callback
+def handle_subscribe_logs(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Send the buffered, then the live log entries of a container."""
+    entity = hass.data[DATA_BALENA].get_entity(msg["entity_id"])
+    if (service_name := getattr(entity, "service_name", None)) is None:
+        connection.send_error(msg["id"], "not_found", "Not a Balena container")
+        return
+    log_stream = entity.coordinator.config_entry.runtime_data.log_stream
+
+    @callback
+    def forward_entry(entry: JournalLogEntry) -> None:
+        connection.send_message(websocket_api.event_message(msg["id"], entry.as_dict()))
+
+    connection.subscriptions[msg["id"]] = log_stream.async_subscribe(
+        service_name, forward_entry
+    )
+    connection.send_result(msg["id"])
+    for entry in log_stream.buffer.get(service_name):
+        forward_entry(entry)
+
+
+# selectors for the bulk control, entity_id/pattern/label_id are mutually exclusive
+CONTROL_CONTAINERS_FIELDS = {
+    vol.Exclusive("entity_id", "selector"): cv.entity_ids,
+    vol.Exclusive("pattern", "selector"): cv.string,
+    vol.Exclusive("label_id", "selector"): cv.string,
+    vol.Required("action"): vol.In(CONTROL_ACTIONS),
+}
+
+
+@callback
+def resolve_container_selector(hass: HomeAssistant, selector: dict[str, Any]) -> list[str]:
+    """Return the entity_ids selected by entity_id, glob pattern or label_id."""
+    if (hass_data := hass.data.get(DATA_BALENA)) is None:
+        return []
+
+    if "pattern" in selector:
+        return hass_data.match_entities(selector["pattern"])
+
+    if "label_id" in selector:
+        registry = er.async_get(hass)
+        return [
+            entry.entity_id
+            for entry in er.async_entries_for_label(registry, selector["label_id"])
+            if hass_data.is_container(entry.entity_id)
+        ]
+
+    return list(selector.get("entity_id", []))
+
+
+async def async_control_containers(
+    hass: HomeAssistant, entity_ids: list[str], action: str
+) -> dict[str, dict[str, Any]]:
+    """Control many containers at once, returning the result per entity_id.
+
+    Concurrency is bounded and the refresh shared by the coordinator command
+    queue, see BalenaSupervisorStateCoordinator.post_container_service.
+    """
+    hass_data = hass.data.get(DATA_BALENA)
+    results: dict[str, dict[str, Any]] = {}
+
+    async def _control(entity_id: str) -> None:
+        start = time.monotonic()
+        try:
+            entity = hass_data.get_entity(entity_id) if hass_data else None
+            if getattr(entity, "service_name", None) is None:
+                raise ServiceValidationError(f"{entity_id} is not a Balena container")
+            await entity.async_control_service(action)
+        except (HomeAssistantError, PermissionError) as err:
+            results[entity_id] = {"result": "error", "error": str(err)}
+        else:
+            results[entity_id] = {"result": "ok"}
+        results[entity_id]["duration"] = round(time.monotonic() - start, 3)
+
+    await asyncio.gather(*(_control(entity_id) for entity_id in entity_ids))
+    return results
+
+
+@websocket_api.require_admin
+@websocket_api.async_response
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "balena_docker/control_containers",
+        **CONTROL_CONTAINERS_FIELDS,
+    }
+)
+async def handle_containers_service(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Handle start/stop/restart service for many containers."""
+    entity_ids = resolve_container_selector(hass, msg)
+    if not entity_ids:
+        connection.send_error(msg["id"], "not_found", "No container matches the selector")
+        return
+
+    results = await async_control_containers(hass, entity_ids, msg["action"])
+    connection.send_result(msg["id"], {"results": results})
+
+
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up Balena Docker integration."""
 
+    async def handle_control_containers(call: ServiceCall) -> ServiceResponse:
+        """Handle the control_containers service, restricted to admin users."""
+        if call.context.user_id:
+            user = await hass.auth.async_get_user(call.context.user_id)
+            if user is None or not user.is_admin:
+                raise Unauthorized(context=call.context)
+
+        entity_ids = resolve_container_selector(hass, call.data)
+        if not entity_ids:
+            raise ServiceValidationError("No container matches the selector")
+
+        return {
+            "results": await async_control_containers(
+                hass, entity_ids, call.data["action"]
+            )
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        "control_containers",
+        handle_control_containers,
+        schema=vol.All(
+            vol.Schema(CONTROL_CONTAINERS_FIELDS),
+            cv.has_at_least_one_key("entity_id", "pattern", "label_id"),
+        ),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    websocket_api.async_register_command(hass, handle_container_service)
+    websocket_api.async_register_command(hass, handle_containers_service)
+    websocket_api.async_register_command(hass, handle_application_action)
+    websocket_api.async_register_command(hass, handle_subscribe_logs)
+
     return True
 
 
@@ -70,54 +250,138 @@ async def async_setup_entry(
     hass: HomeAssistant, config_entry: BalenaDockerConfigEntry
 ) -> bool:
     """Set up Balena Docker from a config entry."""
+    setup_start = time.monotonic()
 
-    if config_entry.data["connection_type"] != "same_device_no_proxy":
-        _LOGGER.info("Only 'same_device_no_proxy' connection type is supported")
+    if config_entry.data["connection_type"] not in ("same_device_no_proxy", "remote"):
+        _LOGGER.info(
+            "Only 'same_device_no_proxy' and 'remote' connection types are supported"
+        )
         return False
+    if (address := get_supervisor_address(config_entry.data)) is None:
+        _LOGGER.error(
+            "BALENA_SUPERVISOR_API_KEY is not set, add the"
+            " io.balena.features.supervisor-api label to the Home Assistant service"
+        )
+        return False
+    url, api_key = address
+
+    # setup hass.data, shared by all config entries
+    if DATA_BALENA not in hass.data:
+        hass.data[DATA_BALENA] = HassData()
+    hass_data = hass.data[DATA_BALENA]
 
     # setup the coordinator
-    url = os.getenv("BALENA_SUPERVISOR_ADDRESS", "http://localhost:8080")
     _LOGGER.info("Using Balena Supervisor API URL: %s", url)
+    options = {**DEFAULT_CONFIG_ENTRY_OPTIONS, **config_entry.options}
+    pool_stats = ConnectionPoolStats()
+    session = create_supervisor_session(hass, pool_stats)
+    async_close_session_on_unload(hass, config_entry, session)
     client = BalenaSupervisorApiClient(
-        async_get_clientsession(hass),
+        session,
         url=url,
-        api_key=os.getenv("BALENA_SUPERVISOR_API_KEY", "testkey"),
+        api_key=api_key,
+        request_timeout=options["request_timeout"],
+        max_retries=options["max_retries"],
+        circuit_breaker=CircuitBreaker(
+            options["circuit_breaker_threshold"], options["circuit_breaker_reset"]
+        ),
+        pool_stats=pool_stats,
+        metrics=ApiMetrics() if options["collect_metrics"] else None,
+    )
+    coordinator = BalenaSupervisorStateCoordinator(
+        hass,
+        config_entry,
+        client,
+        scheduler=hass_data.fleet_scheduler,
+        crash_loop_threshold=options["crash_loop_threshold"],
+        default_update_interval=timedelta(seconds=options["update_interval"]),
     )
-    coordinator = BalenaSupervisorStateCoordinator(hass, config_entry, client)
-    await coordinator.async_refresh()
-    coordinator.start_burst_refresh()
 
-    # abort if cannot fetch initial data from API
-    if coordinator.last_update_success is False:
-        _LOGGER.info("Failed to fetch data from Balena Supervisor API")
-        return False
+    # warm start: create entities from the last known state, refreshed in background
+    warm_start = await coordinator.async_load_snapshot()
+    if not warm_start:
+        await coordinator.async_refresh()
+
+        # abort if cannot fetch initial data from API
+        if coordinator.last_update_success is False:
+            if isinstance(coordinator.last_exception, InvalidApiKey):
+                _LOGGER.error("The Balena Supervisor at %s rejected the API key", url)
+            _LOGGER.info("Failed to fetch data from Balena Supervisor API")
+            return False
+
+    coordinator.start_burst_refresh()
 
     # setup runtime data
     config_entry.runtime_data = ConfigEntryRuntimeData(
         state_coordinator=coordinator,
         api_client=client,
+        setup_mode="warm" if warm_start else "cold",
+        log_stream=BalenaLogStream(hass, config_entry, client),
     )
 
-    # setup hass.data
-    if DATA_BALENA not in hass.data:
-        hass.data[DATA_BALENA] = HassData()
-    hass.data[DATA_BALENA].add_config_entry(config_entry)
+    hass_data.add_config_entry(config_entry)
+
+    # container resource metrics, polled slower than the state, and pushed statuses
+    if config_entry.data["connection_type"] == "same_device_no_proxy" and (
+        engine_client := await async_create_engine_client(
+            hass, options["request_timeout"]
+        )
+    ):
+        async_close_session_on_unload(hass, config_entry, engine_client.session)
+        resource_coordinator = BalenaResourceCoordinator(
+            hass,
+            config_entry,
+            engine_client,
+            update_interval=timedelta(seconds=options["resource_update_interval"]),
+        )
+        await resource_coordinator.async_refresh()
+        config_entry.runtime_data.resource_coordinator = resource_coordinator
+        # only used on the same device, imported in the executor when needed
+        push = await async_import_module(hass, f"{__package__}.push")
+        config_entry.runtime_data.event_bridge = push.BalenaEventBridge(
+            hass, config_entry, coordinator, engine_client
+        )
+        config_entry.runtime_data.event_bridge.async_start()
 
     # invoking async_setup_entry from sensor.py
     await hass.config_entries.async_forward_entry_setups(
         config_entry, [Platform.SENSOR]
     )
 
-    # register websocket command for frontend
-    websocket_api.async_register_command(hass, handle_container_service)
+    runtime_data = config_entry.runtime_data
+    runtime_data.setup_duration = time.monotonic() - setup_start
+    _LOGGER.info(
+        "Balena Docker set up in %.3fs (%s start)",
+        runtime_data.setup_duration,
+        runtime_data.setup_mode,
+    )
+    if warm_start:
+        config_entry.async_create_background_task(
+            hass, coordinator.async_refresh(), "balena_docker refresh after warm start"
+        )
 
-    # register frontend modules
+    # register frontend modules, the frontend component is only imported when needed
     if config_entry.data["auto_load_js_modules"]:
-        config_entry.runtime_data.js_modules = await load_js_modules(hass)
+        frontend = await async_import_module(hass, f"{__package__}.frontend")
+        config_entry.runtime_data.js_modules = await frontend.load_js_modules(
+            hass, config_entry.entry_id
+        )
+
+    # reload to apply the new client options
+    config_entry.async_on_unload(
+        config_entry.add_update_listener(async_reload_entry)
+    )
 
     return True
 
 
+async def async_reload_entry(
+    hass: HomeAssistant, config_entry: BalenaDockerConfigEntry
+) -> None:
+    """Reload the config entry when its options are updated."""
+    await hass.config_entries.async_reload(config_entry.entry_id)
+
+
 async def async_unload_entry(
     hass: HomeAssistant, config_entry: BalenaDockerConfigEntry
 ) -> bool:
@@ -131,7 +395,18 @@ async def async_unload_entry(
 
     # unload lovelace JS modules that were loaded in async_setup_entry, given the config may have been updated, use the runtime data instead of config data
     if config_entry.runtime_data.js_modules:
-        await unload_js_modules(hass, config_entry.runtime_data.js_modules)
+        frontend = await async_import_module(hass, f"{__package__}.frontend")
+        await frontend.unload_js_modules(hass, config_entry.entry_id)
+
+    hass_data = hass.data[DATA_BALENA]
+    owned_fleet_summary = hass_data.fleet_summary_entry_id == config_entry.entry_id
+    hass_data.remove_config_entry(config_entry)
+    # hand the fleet summary sensor over to another loaded remote entry, if any
+    if owned_fleet_summary and hass_data.fleet_summary_adders:
+        sensor = await async_import_module(hass, f"{__package__}.sensor")
+        sensor.async_add_fleet_summary(hass_data)
+
+    # the dedicated sessions are closed by async_close_session_on_unload
 
     return True
 
@@ -143,4 +418,5 @@ async def async_remove_entry(
 
     Called when user click on "Delete" in the UI.
     """
-    return True
+    # remove the snapshot saved by BalenaSupervisorStateCoordinator
+    await create_snapshot_store(hass, config_entry.entry_id).async_remove()
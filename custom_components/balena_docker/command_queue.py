@@ -0,0 +1,80 @@
+"""Queue for container control commands sent to the Balena Supervisor."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+_LOGGER = logging.getLogger(__name__)
+
+type CommandKey = tuple[int, str, str]  # (app_id, service_name, action)
+
+
+class ServiceCommandQueue:
+    """Serialize commands per service, coalesce duplicates and bound concurrency.
+
+    - a command identical to the latest one submitted for the same service
+      within coalesce_window seconds is merged into it;
+    - commands to the same service are sent in submission order;
+    - commands to different services are sent concurrently, up to max_concurrency.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        send: Callable[[int, str, str], Awaitable[None]],
+        max_concurrency: int = 4,
+        coalesce_window: float = 2.0,
+    ) -> None:
+        """Initialize the queue, send is called as send(app_id, service_name, action)."""
+        self._hass = hass
+        self._send = send
+        self._coalesce_window = coalesce_window
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._service_locks: dict[tuple[int, str], asyncio.Lock] = {}
+        self._latest: dict[tuple[int, str], CommandKey] = {}
+        self._pending: dict[CommandKey, asyncio.Task[None]] = {}
+
+    async def async_submit(self, app_id: int, service_name: str, action: str) -> None:
+        """Queue a command and wait until it has been sent."""
+        service_key = (app_id, service_name)
+        key = (app_id, service_name, action)
+
+        task = self._pending.get(key)
+        if task is not None and self._latest.get(service_key) == key:
+            _LOGGER.debug("Coalescing %s for service %s", action, service_name)
+        else:
+            task = self._hass.async_create_task(
+                self._async_run(key), f"balena_docker {action} {service_name}"
+            )
+            self._pending[key] = task
+            self._latest[service_key] = key
+            task.add_done_callback(lambda task: self._on_done(key, task))
+
+        # shield, so a cancelled caller does not cancel the merged callers
+        await asyncio.shield(task)
+
+    async def _async_run(self, key: CommandKey) -> None:
+        """Send a command once its service and a concurrency slot are free."""
+        app_id, service_name, action = key
+        lock = self._service_locks.setdefault((app_id, service_name), asyncio.Lock())
+        async with lock, self._semaphore:
+            await self._send(app_id, service_name, action)
+
+    @callback
+    def _on_done(self, key: CommandKey, task: asyncio.Task[None]) -> None:
+        """Keep a successful command around for the coalesce window."""
+
+        @callback
+        def _expire(*_) -> None:
+            if self._pending.get(key) is task:
+                del self._pending[key]
+
+        if task.cancelled() or task.exception() is not None:
+            _expire()  # let the next caller retry straight away
+        else:
+            async_call_later(self._hass, self._coalesce_window, _expire)
@@ -1,45 +1,164 @@
+import logging
 import voluptuous as vol
 from typing import Any
 
+from yarl import URL
+
 from homeassistant import config_entries
+from homeassistant.core import callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.update_coordinator import UpdateFailed
 
 from .const import DOMAIN, JS_MODULES
-from .types import ConfigEntryData, create_config_entry_data_schema
+from .coordinator import (
+    BalenaSupervisorApiClient,
+    InvalidApiKey,
+    SupervisorProbe,
+    get_supervisor_address,
+)
+from .types import (
+    DEFAULT_CONFIG_ENTRY_OPTIONS,
+    ConfigEntryData,
+    ConfigEntryOptions,
+    create_config_entry_data_schema,
+    create_config_entry_options_schema,
+)
+
+
+_LOGGER = logging.getLogger(__name__)
 
 
 class BalenaDockerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Balena Docker config flow."""
 
+    _PROBE_TIMEOUT = 10  # seconds, per request, never retried
+
     # The schema version of the entries that it creates
     # Home Assistant will call your migrate method if the version changes
     VERSION = 1
     MINOR_VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """Get the options flow for this handler."""
+        return BalenaDockerOptionsFlow()
+
+    async def _async_probe(
+        self, data: ConfigEntryData, errors: dict[str, str], placeholders: dict[str, str]
+    ) -> SupervisorProbe | None:
+        """Probe the supervisor of data, filling errors if it can not be used."""
+        if data["connection_type"] == "remote" and not (
+            data.get("url") and data.get("api_key")
+        ):
+            errors["base"] = "remote_requires_url"
+            return None
+        if (address := get_supervisor_address(data)) is None:
+            errors["base"] = "missing_api_key"
+            return None
+        url, api_key = address
+        client = BalenaSupervisorApiClient(
+            async_get_clientsession(self.hass),
+            url=url,
+            api_key=api_key,
+            request_timeout=self._PROBE_TIMEOUT,
+            max_retries=0,
+        )
+        try:
+            probe = await client.probe()
+        except InvalidApiKey:
+            errors["base"] = "invalid_auth"
+        except UpdateFailed as err:
+            errors["base"] = "cannot_connect"
+            placeholders["error"] = str(err)
+        else:
+            _LOGGER.info(
+                "Probed Balena Supervisor at %s: ping %.3fs, state %.3fs, %d services",
+                url,
+                probe.ping_latency,
+                probe.state_latency,
+                probe.services,
+            )
+            return probe
+        return None
+
     async def async_step_user(self, user_input: ConfigEntryData | None = None):
-        """Handle the initial step, when user adds the integration manually."""
+        """Handle the initial step, when user adds the integration manually.
+
+        The supervisor is probed before the entry is created, its latency and
+        number of services give the suggested refresh interval of the options.
+        """
+        errors: dict[str, str] = {}
+        placeholders: dict[str, str] = {"error": ""}
         if user_input is not None:
-            return self.async_create_entry(title="Balena Docker", data=user_input)
+            if user_input["connection_type"] == "remote":
+                if not user_input.get("url") or not user_input.get("api_key"):
+                    errors["base"] = "remote_requires_url"
+                else:
+                    # one config entry per remote supervisor
+                    user_input["url"] = user_input["url"].rstrip("/")
+                    await self.async_set_unique_id(user_input["url"])
+                    self._abort_if_unique_id_configured()
+                    host = URL(user_input["url"]).host or user_input["url"]
+                    title = f"Balena Docker ({host})"
+            else:
+                await self.async_set_unique_id("same_device")
+                self._abort_if_unique_id_configured()
+                title = "Balena Docker"
+
+            if not errors and (
+                probe := await self._async_probe(user_input, errors, placeholders)
+            ):
+                return self.async_create_entry(
+                    title=title,
+                    data=user_input,
+                    options={
+                        **DEFAULT_CONFIG_ENTRY_OPTIONS,
+                        "update_interval": probe.suggested_update_interval,
+                    },
+                )
 
         return self.async_show_form(
             step_id="user",
-            data_schema=create_config_entry_data_schema({}),
+            data_schema=create_config_entry_data_schema(user_input or {}),
+            errors=errors,
+            description_placeholders=placeholders,
         )
 
     async def async_step_reconfigure(self, user_input: ConfigEntryData | None = None):
         """Handle reconfiguring an existing config entry."""
         # If editing an existing entry, use its data as defaults
-        defaults: dict[str, Any] = {}
-        if self._async_current_entries():
-            entry = self._async_current_entries()[0]
-            defaults = dict(entry.data)
+        defaults: dict[str, Any] = dict(self._get_reconfigure_entry().data)
 
+        errors: dict[str, str] = {}
+        placeholders: dict[str, str] = {"error": ""}
         if user_input is not None:
-            return self.async_update_reload_and_abort(
-                self._get_reconfigure_entry(),
-                data_updates=user_input,
-            )
+            # the options, and their refresh interval, are left as tuned
+            if await self._async_probe({**defaults, **user_input}, errors, placeholders):
+                return self.async_update_reload_and_abort(
+                    self._get_reconfigure_entry(),
+                    data_updates=user_input,
+                )
 
         return self.async_show_form(
             step_id="reconfigure",
-            data_schema=create_config_entry_data_schema(defaults),
+            data_schema=create_config_entry_data_schema(user_input or defaults),
+            errors=errors,
+            description_placeholders=placeholders,
+        )
+
+
+class BalenaDockerOptionsFlow(config_entries.OptionsFlow):
+    """Balena Docker options flow, for tuning the supervisor API client."""
+
+    async def async_step_init(self, user_input: ConfigEntryOptions | None = None):
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=create_config_entry_options_schema(self.config_entry.options),
         )
@@ -9,3 +9,6 @@ DOMAIN = "balena_docker"
 DATA_BALENA: HassKey[HassData] = HassKey(DOMAIN)
 JS_MODULES = ["more-info-balena_docker.js"]
 JS_URL_PATH = f"/{DOMAIN.lower()}"
+CONTROL_ACTIONS = ["start-service", "stop-service", "restart-service"]
+APPLICATION_ACTIONS = ["restart", "purge"]
+EVENT_CRASH_LOOP = f"{DOMAIN}_crash_loop"
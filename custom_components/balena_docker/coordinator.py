@@ -1,124 +1,852 @@
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Iterable
+import dataclasses
 from datetime import timedelta
 import logging
+import os
+import random
+import time
+from typing import Any
 import aiohttp
 
-from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.event import async_call_later
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
 from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.util.json import JSON_DECODE_EXCEPTIONS, json_loads
 
-from .types import BalenaAppState, BalenaServiceState
+from .command_queue import ServiceCommandQueue
+from .const import DOMAIN, EVENT_CRASH_LOOP
+from .fleet import FleetScheduler
+from .history import StatusHistoryTracker
+from .logs import JournalLogEntry, parse_journal_entry
+from .metrics import ApiMetrics
+from .optimistic import OptimisticStatusTracker
+from .progress import DownloadProgressTracker
+from .session import ConnectionPoolStats
+from .health import BalenaDeviceHealth, FetchPlanner
+from .types import (
+    DEFAULT_CONFIG_ENTRY_OPTIONS,
+    BalenaDeviceInfo,
+    BalenaService,
+    BalenaStateStatus,
+    BalenaSupervisorState,
+    ConfigEntryData,
+    InvalidSupervisorState,
+    ServiceKey,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 
+class InvalidApiKey(UpdateFailed):
+    """The supervisor rejected the API key."""
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class SupervisorProbe:
+    """Round trip latencies and size of a supervisor, see BalenaSupervisorApiClient.probe."""
+
+    ping_latency: float  # seconds
+    state_latency: float  # seconds, fetching and decoding the state
+    services: int
+
+    _MAX_UPDATE_INTERVAL = 600  # seconds
+    _SECONDS_PER_SERVICE = 2
+
+    @property
+    def suggested_update_interval(self) -> int:
+        """Return the seconds between refreshes keeping polling light on this supervisor.
+
+        The default interval, lengthened so that a refresh takes at most 1% of
+        it and by every service, up to 10 minutes, rounded up to 10 seconds.
+        """
+        seconds = max(
+            DEFAULT_CONFIG_ENTRY_OPTIONS["update_interval"],
+            self.state_latency * 100,
+            self.services * self._SECONDS_PER_SERVICE,
+        )
+        return min(self._MAX_UPDATE_INTERVAL, -int(-seconds // 10) * 10)
+
+
+def get_supervisor_address(data: ConfigEntryData) -> tuple[str, str] | None:
+    """Return the URL and API key of the supervisor of a config entry, None if unknown.
+
+    On the same device, the supervisor sets them in the environment of services
+    labelled io.balena.features.supervisor-api, there is no default key.
+    """
+    if data["connection_type"] == "remote":
+        return data["url"], data["api_key"]
+    if not (api_key := os.getenv("BALENA_SUPERVISOR_API_KEY")):
+        return None
+    return os.getenv("BALENA_SUPERVISOR_ADDRESS", "http://localhost:8080"), api_key
+
+
+class CircuitBreaker:
+    """Fail fast after repeated failures, and probe again after reset_timeout seconds."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        """Initialize a closed circuit breaker."""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        """Return True if requests should not be sent to the API."""
+        if self._opened_at is None:
+            return False
+        # half-open: let one request through once the reset timeout has passed
+        return time.monotonic() - self._opened_at < self.reset_timeout
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful request."""
+        if self._opened_at is not None:
+            _LOGGER.info("Balena Supervisor API recovered, closing circuit breaker")
+        self.failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        """Count a failed request, opening the breaker once the threshold is hit."""
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            if self._opened_at is None:
+                _LOGGER.warning(
+                    "Balena Supervisor API failed %d times, pausing requests for %ss",
+                    self.failures,
+                    self.reset_timeout,
+                )
+            self._opened_at = time.monotonic()
+
+
 class BalenaSupervisorApiClient:
     """Client to interact with Balena Supervisor API."""
 
-    def __init__(self, session: aiohttp.ClientSession, url: str, api_key: str) -> None:
-        """Initialize the client."""
+    _RETRY_BACKOFF_BASE = 0.5  # seconds, doubled on every attempt
+    _RETRY_BACKOFF_MAX = 5.0
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        api_key: str,
+        request_timeout: float = 10,
+        max_retries: int = 2,
+        circuit_breaker: CircuitBreaker | None = None,
+        pool_stats: ConnectionPoolStats | None = None,
+        metrics: ApiMetrics | None = None,
+    ) -> None:
+        """Initialize the client, metrics are only collected when given."""
         self.session = session
         self._url = url
         self._api_key = api_key
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(5, 60)
+        self.pool_stats = pool_stats or ConnectionPoolStats()
+        self.metrics = metrics
+        # the last state body and its decoded state, reused while the body is unchanged
+        self._last_state_body: bytes | None = None
+        self._last_state: BalenaSupervisorState | None = None
+        self.state_cache_hits = 0
+        self.state_cache_misses = 0
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        *,
+        retries: int = 0,
+        timeout: float | None = None,
+        **kwargs,
+    ) -> bytes:
+        """Send a request and return the response body.
+
+        Connection errors, timeouts and 5xx responses are retried up to retries
+        times with jittered exponential backoff, and counted by the circuit breaker.
+        """
+        if self.circuit_breaker.is_open:
+            raise UpdateFailed("Balena Supervisor API is unavailable (circuit open)")
+
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self.request_timeout)
+        for attempt in range(retries + 1):
+            start = time.monotonic()
+            try:
+                async with self.session.request(
+                    method,
+                    f"{self._url}{path}",
+                    params={"apikey": self._api_key},
+                    timeout=client_timeout,
+                    **kwargs,
+                ) as resp:
+                    body = await resp.read()
+                    if resp.status >= 500:
+                        raise aiohttp.ClientResponseError(
+                            resp.request_info, resp.history, status=resp.status
+                        )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                if self.metrics is not None:
+                    self.metrics.record_request(
+                        method, path, time.monotonic() - start, 0, error=True
+                    )
+                if attempt == retries:
+                    self.circuit_breaker.record_failure()
+                    raise UpdateFailed(
+                        f"Error communicating with API: {err!r}"
+                    ) from err
+                delay = random.uniform(
+                    0, min(self._RETRY_BACKOFF_MAX, self._RETRY_BACKOFF_BASE * 2**attempt)
+                )
+                _LOGGER.debug(
+                    "%s %s failed (%r), retrying in %.2fs", method, path, err, delay
+                )
+                await asyncio.sleep(delay)
+            else:
+                if self.metrics is not None:
+                    self.metrics.record_request(
+                        method,
+                        path,
+                        time.monotonic() - start,
+                        len(body),
+                        error=resp.status >= 400,
+                    )
+                self.circuit_breaker.record_success()
+                if resp.status == 401:
+                    raise InvalidApiKey("The Balena Supervisor rejected the API key")
+                if resp.status >= 400:
+                    raise UpdateFailed(
+                        f"Error communicating with API: {resp.status} {body.decode(errors='replace')}"
+                    )
+                return body
+
+        raise AssertionError("unreachable")
 
-    async def get_state(self) -> BalenaAppState:
-        """Fetch the app state, using https://docs.balena.io/reference/supervisor/supervisor-api/#get-v2applicationsstate endpoint."""
-        async with self.session.get(
-            f"{self._url}/v2/applications/state", params={"apikey": self._api_key}
-        ) as resp:
-            resp_json = await resp.json()
+    async def get_state(self, timeout: float | None = None) -> BalenaSupervisorState:
+        """Fetch the state of all apps, using https://docs.balena.io/reference/supervisor/supervisor-api/#get-v2applicationsstate endpoint.
 
-            if len(resp_json) != 1:
-                raise UpdateFailed("Expect exactly one application in response")
+        The body is decoded by orjson (json_loads) and validated into records once,
+        a malformed body fails the refresh instead of breaking entities later.
+        When the body is byte for byte the previous one, the previous state object
+        is returned without decoding, callers can check for it with `is`.
+        """
+        body = await self._request(
+            "GET",
+            "/v2/applications/state",
+            retries=self.max_retries,
+            timeout=timeout,
+        )
+        if self._last_state is not None and body == self._last_state_body:
+            self.state_cache_hits += 1
+            return self._last_state
+        self.state_cache_misses += 1
+
+        try:
+            state = BalenaSupervisorState.from_response(json_loads(body))
+        except JSON_DECODE_EXCEPTIONS as err:
+            raise UpdateFailed(f"Invalid JSON from /v2/applications/state: {err}") from err
+        except InvalidSupervisorState as err:
+            raise UpdateFailed(f"Malformed /v2/applications/state: {err}") from err
+        self._last_state_body, self._last_state = body, state
+        return state
+
+    async def ping(self, timeout: float | None = None) -> None:
+        """Check the supervisor is up, using https://docs.balena.io/reference/supervisor/supervisor-api/#get-ping endpoint."""
+        await self._request("GET", "/ping", timeout=timeout)
+
+    async def probe(self) -> SupervisorProbe:
+        """Ping and fetch the state concurrently, measuring both round trips.
+
+        Raise InvalidApiKey for a rejected key, UpdateFailed for any other failure.
+        """
+
+        async def timed(request: Awaitable[Any]) -> tuple[float, Any]:
+            start = time.monotonic()
+            result = await request
+            return time.monotonic() - start, result
+
+        ping, state = await asyncio.gather(
+            timed(self.ping()), timed(self.get_state()), return_exceptions=True
+        )
+        # the state is authenticated, its error tells a wrong key apart
+        for result in (state, ping):
+            if isinstance(result, BaseException):
+                raise result
+        return SupervisorProbe(
+            ping_latency=ping[0], state_latency=state[0], services=len(state[1].services)
+        )
+
+    def state_cache_stats(self) -> dict[str, int | float | None]:
+        """Return how often get_state skipped decoding an unchanged body."""
+        total = self.state_cache_hits + self.state_cache_misses
+        return {
+            "state_cache_hits": self.state_cache_hits,
+            "state_cache_misses": self.state_cache_misses,
+            "state_cache_hit_rate": round(self.state_cache_hits / total, 3)
+            if total
+            else None,
+        }
+
+    async def get_device(self) -> BalenaDeviceInfo:
+        """Fetch the device details, using https://docs.balena.io/reference/supervisor/supervisor-api/#get-v1device endpoint."""
+        return json_loads(
+            await self._request("GET", "/v1/device", retries=self.max_retries)
+        )
+
+    async def get_state_status(self) -> BalenaStateStatus:
+        """Fetch the update status, using https://docs.balena.io/reference/supervisor/supervisor-api/#get-v2statestatus endpoint."""
+        return json_loads(
+            await self._request("GET", "/v2/state/status", retries=self.max_retries)
+        )
 
-            app_name, content = next(iter(resp_json.items()))
-            return BalenaAppState(name=app_name, **content)
+    async def get_version(self) -> str:
+        """Fetch the supervisor version, using https://docs.balena.io/reference/supervisor/supervisor-api/#get-v2version endpoint."""
+        resp_json = json_loads(
+            await self._request("GET", "/v2/version", retries=self.max_retries)
+        )
+        return resp_json["version"]
+
+    async def stream_journal_logs(
+        self,
+        service_name: str | None = None,
+        *,
+        follow: bool = True,
+        count: int = 0,
+        since: float | None = None,
+        idle_timeout: float | None = None,
+    ) -> AsyncIterator[JournalLogEntry]:
+        """Stream container logs, using https://docs.balena.io/reference/supervisor/supervisor-api/#post-v2journal-logs endpoint.
+
+        Yields the entries of service_name, or of all containers, starting with
+        the last count entries of the journal, or with the entries written at
+        or after since (seconds since the epoch). Lines are only read from the
+        response as the caller iterates, so a slow caller applies backpressure.
+        Fails once no line was read for idle_timeout seconds, a silently dropped
+        connection would never end the stream otherwise.
+        """
+        if self.circuit_breaker.is_open:
+            raise UpdateFailed("Balena Supervisor API is unavailable (circuit open)")
+
+        body: dict[str, Any] = {"follow": follow, "all": False, "format": "json"}
+        if count:
+            body["count"] = count
+        if since is not None:
+            # passed to journalctl --since, which takes @ and epoch seconds
+            body["since"] = f"@{since:.6f}"
+        try:
+            async with self.session.post(
+                f"{self._url}/v2/journal-logs",
+                params={"apikey": self._api_key},
+                json=body,
+                # a followed stream never completes, only bound the connection and reads
+                timeout=aiohttp.ClientTimeout(
+                    total=None, connect=self.request_timeout, sock_read=idle_timeout
+                ),
+            ) as resp:
+                if resp.status >= 400:
+                    raise UpdateFailed(f"Error streaming journal logs: {resp.status}")
+                async for line in resp.content:
+                    entry = parse_journal_entry(line)
+                    if entry is not None and service_name in (None, entry.service_name):
+                        yield entry
+        # ValueError is raised by aiohttp for a line longer than its read buffer
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as err:
+            raise UpdateFailed(f"Error streaming journal logs: {err!r}") from err
 
     async def post_container_service(
-        self, app_id: int, service_name: str, action: str
+        self, app_id: int, service_name: str, action: str, timeout: float | None = None
     ) -> None:
         """Control a container service, using https://docs.balena.io/reference/supervisor/supervisor-api/ endpoint."""
         if action not in ("start-service", "stop-service", "restart-service"):
             raise ServiceValidationError("Invalid action to control container service")
 
-        async with self.session.post(
-            f"{self._url}/v2/applications/{app_id}/{action}",
-            headers={"Content-Type": "application/json"},
-            params={"apikey": self._api_key},
-            json={"serviceName": service_name},
-        ) as resp:
-            resp_text = await resp.text()
-            if "OK" not in resp_text:
-                raise UpdateFailed(f"Error communicating with API: {resp_text}")
+        # not idempotent, never retried
+        resp_text = (
+            await self._request(
+                "POST",
+                f"/v2/applications/{app_id}/{action}",
+                timeout=timeout,
+                headers={"Content-Type": "application/json"},
+                json={"serviceName": service_name},
+            )
+        ).decode(errors="replace")
+        if "OK" not in resp_text:
+            raise UpdateFailed(f"Error communicating with API: {resp_text}")
 
+    async def post_application_action(
+        self, app_id: int, action: str, timeout: float | None = None
+    ) -> None:
+        """Restart or purge all services of an application in one request, using https://docs.balena.io/reference/supervisor/supervisor-api/#post-v2applicationsappidrestart endpoint."""
+        if action not in ("restart", "purge"):
+            raise ServiceValidationError("Invalid action to control application")
 
-class BalenaSupervisorStateCoordinator(DataUpdateCoordinator[BalenaAppState]):
-    """Class to buffer current state in type of BalenaAppState."""
+        # not idempotent, never retried
+        resp_text = (
+            await self._request(
+                "POST",
+                f"/v2/applications/{app_id}/{action}",
+                timeout=timeout,
+                headers={"Content-Type": "application/json"},
+                json={"force": False},
+            )
+        ).decode(errors="replace")
+        if "OK" not in resp_text:
+            raise UpdateFailed(f"Error communicating with API: {resp_text}")
+
+
+@callback
+def create_snapshot_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Create the store keeping the last known state of a config entry."""
+    return Store(hass, 1, f"{DOMAIN}.{entry_id}")
+
+
+class BalenaSupervisorStateCoordinator(DataUpdateCoordinator[BalenaSupervisorState]):
+    """Class to buffer current state of all apps in type of BalenaSupervisorState."""
 
     _DEFAULT_UPDATE_INTERVAL = timedelta(minutes=5)
+    _PUSH_UPDATE_INTERVAL = timedelta(minutes=30)  # reconciliation while events are pushed
     _BURST_UPDATE_INTERVAL = timedelta(seconds=10)
-    _BURST_DURATION = timedelta(seconds=90)
+    _TRANSITION_UPDATE_INTERVAL = timedelta(seconds=3)
+    _BACKOFF_FACTOR = 2
+    # statuses the supervisor moves out of by itself, others like dead or paused can last
+    _TRANSITIONAL_STATUSES = frozenset(
+        (
+            "downloading",
+            "installing",
+            "starting",
+            "stopping",
+            "awaiting handover",
+            "handing over",
+        )
+    )
+    _COMMAND_CONCURRENCY = 4
+    _COMMAND_COALESCE_WINDOW = timedelta(seconds=2)
+    _COMMAND_REFRESH_COOLDOWN = timedelta(seconds=1)
+    # rollback of the status shown after a control action, if the supervisor never changes it
+    _OPTIMISTIC_TIMEOUT = timedelta(seconds=30)
+    _CRASH_LOOP_WINDOW = timedelta(minutes=10)
+    EVERY_REFRESH = "every_refresh"  # listener context, called even for an unchanged state
+    _SNAPSHOT_SAVE_DELAY = 30  # seconds, coalesces writes during transitions
+    # seconds a device endpoint response is reused, 0 to fetch on every refresh
+    _HEALTH_ENDPOINT_TTLS = {
+        "/v2/state/status": 0,
+        "/v1/device": 60,
+        "/v2/version": 24 * 3600,
+    }
 
     def __init__(
         self,
         hass: HomeAssistant,
         config_entry: ConfigEntry,
         client: BalenaSupervisorApiClient,
+        scheduler: FleetScheduler | None = None,
+        crash_loop_threshold: int = DEFAULT_CONFIG_ENTRY_OPTIONS["crash_loop_threshold"],
+        default_update_interval: timedelta = _DEFAULT_UPDATE_INTERVAL,
     ) -> None:
-        """Initialize State Coordinator."""
+        """Initialize State Coordinator, polling every default_update_interval while steady."""
+        self._default_update_interval = default_update_interval
         super().__init__(
             hass,
             logger=_LOGGER,
             name="balena_supervisor",
-            update_interval=self._DEFAULT_UPDATE_INTERVAL,
+            update_interval=default_update_interval,
             config_entry=config_entry,
             update_method=self._async_update_data,
         )
         self.client = client
-        self.app_id: int | None = None  # type: int | None
-        self._burst_unsub: callable | None = None
+        self._scheduler = scheduler or FleetScheduler()
+        self.update_reason: str = "default"
+        self.changed_services: set[ServiceKey] = set()
+        # services that appeared or disappeared in the last refresh, see sensor.BalenaEntitySync
+        self.added_services: set[ServiceKey] = set()
+        self.removed_services: set[ServiceKey] = set()
+        self.stale = False  # True while data comes from the snapshot on disk
+        # True when the last refresh returned the same state and health, listeners are skipped
+        self.unchanged = False
+        self._health_changed = False
+        self.push_connected = False  # statuses are pushed, see push.BalenaEventBridge
+        self.refreshes = 0  # successful polls, pushed updates are not counted
+        self._notified: tuple[bool, bool] | None = None
+        self._store = create_snapshot_store(hass, config_entry.entry_id)
+        self.download_progress = DownloadProgressTracker()
+        self.status_history = StatusHistoryTracker(
+            crash_loop_threshold, self._CRASH_LOOP_WINDOW.total_seconds()
+        )
+        self._cancel_crash_loop_end: CALLBACK_TYPE | None = None
+        self.fetch_planner = FetchPlanner(self._HEALTH_ENDPOINT_TTLS)
+        self.health: BalenaDeviceHealth | None = None
+        self.command_queue = ServiceCommandQueue(
+            hass,
+            client.post_container_service,
+            max_concurrency=self._COMMAND_CONCURRENCY,
+            coalesce_window=self._COMMAND_COALESCE_WINDOW.total_seconds(),
+        )
+        # one refresh after a burst of commands, instead of one per command
+        self._command_refresh_debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=self._COMMAND_REFRESH_COOLDOWN.total_seconds(),
+            immediate=False,
+            function=self.async_refresh,
+        )
+        self.optimistic = OptimisticStatusTracker(
+            hass,
+            self._async_update_service_listeners,
+            timeout=self._OPTIMISTIC_TIMEOUT.total_seconds(),
+        )
 
-    async def _async_update_data(self) -> BalenaAppState:
+    async def _async_update_data(self) -> BalenaSupervisorState:
+        # staggered with the other devices, not counted in the refresh duration
+        await self._scheduler.async_wait_turn()
+        start = time.monotonic()
+        self.unchanged = False
         try:
-            data = await self.client.get_state()
-            self.app_id = data["appId"]
+            data = await self._async_fetch_planned()
         except Exception as err:
+            self._slow_down_while_unhealthy()
+            if isinstance(err, UpdateFailed):
+                raise
             raise UpdateFailed(f"Error communicating with API: {err}") from err
         else:
+            if self.client.metrics is not None:
+                self.client.metrics.record_refresh(time.monotonic() - start)
+            if data is self.data:
+                # same body as the last refresh, nothing to diff
+                self.changed_services = set()
+                self.added_services = set()
+                self.removed_services = set()
+                self.unchanged = not self._health_changed and not self.stale
+            else:
+                self.changed_services = self._diff_services(data)
+                previous = self.data.services.keys() if self.data else set()
+                self.added_services = data.services.keys() - previous
+                self.removed_services = previous - data.services.keys()
+                # services loaded from the snapshot were not sampled yet
+                self._async_record_status_history(
+                    data,
+                    data.services.keys()
+                    if self.data is None or self.stale
+                    else self.changed_services,
+                )
+                if self.removed_services:
+                    self.status_history.retain(data.services.keys())
+            # also for an unchanged state, restart-service is answered once running again
+            if reconciled := self.optimistic.async_reconcile(data.services):
+                self.changed_services = self.changed_services | reconciled
+                self.unchanged = False
+            if data is not self.data or self.download_progress.active:
+                for key, service in data.services.items():
+                    self.download_progress.add_sample(key, service.download_progress)
+                self.download_progress.retain(data.services.keys())
+            _LOGGER.debug(
+                "%d of %d services changed", len(self.changed_services), len(data.services)
+            )
+            self._adapt_update_interval(data)
+            self.stale = False
+            self.refreshes += 1
+            if self.changed_services:
+                self._store.async_delay_save(data.as_response, self._SNAPSHOT_SAVE_DELAY)
             return data
 
-    async def post_container_service(
-        self, app_id: int, service_name: str, action: str
-    ) -> None:
-        """Call post_container_service and burst refresh interval for _BURST_DURATION seconds."""
-        await self.client.post_container_service(app_id, service_name, action)
-        self.start_burst_refresh()
+    async def async_load_snapshot(self) -> bool:
+        """Use the last known state saved on disk as data, marked as stale.
+
+        Return False if there is no snapshot, the first refresh must then succeed.
+        """
+        if not (snapshot := await self._store.async_load()):
+            return False
+        try:
+            data = BalenaSupervisorState.from_response(snapshot)
+        except InvalidSupervisorState as err:
+            _LOGGER.warning("Ignoring the saved supervisor state: %s", err)
+            return False
+        self.stale = True
+        self.changed_services = set()
+        self.async_set_updated_data(data)
+        return True
+
+    async def _async_fetch_planned(self) -> BalenaSupervisorState:
+        """Fetch the app state together with the device endpoints due in this cycle.
+
+        Each endpoint is requested at most once per refresh; device endpoints
+        failing only leave their cached response in place.
+        """
+        fetchers = {
+            "/v2/state/status": self.client.get_state_status,
+            "/v1/device": self.client.get_device,
+            "/v2/version": self.client.get_version,
+        }
+        planned = self.fetch_planner.plan()
+        data, *responses = await asyncio.gather(
+            self.client.get_state(),
+            *(fetchers[endpoint]() for endpoint in planned),
+            return_exceptions=True,
+        )
+        if isinstance(data, BaseException):
+            raise data
+
+        for endpoint, response in zip(planned, responses, strict=True):
+            if isinstance(response, BaseException):
+                _LOGGER.debug("Failed to fetch %s: %s", endpoint, response)
+            else:
+                self.fetch_planner.record(endpoint, response)
+
+        cache = self.fetch_planner.cache
+        health = BalenaDeviceHealth.from_responses(
+            cache.get("/v1/device"), cache.get("/v2/state/status"), cache.get("/v2/version")
+        )
+        self._health_changed = health != self.health
+        self.health = health
+        return data
 
     @callback
-    def start_burst_refresh(
-        self,
-        interval: timedelta = _BURST_UPDATE_INTERVAL,
-        duration: timedelta = _BURST_DURATION,
+    def _diff_services(self, data: BalenaSupervisorState) -> set[ServiceKey]:
+        """Return the keys of services added, removed or changed since the last refresh."""
+        previous = self.data.services if self.data else {}
+        current = data.services
+        changed = {
+            key
+            for key, service in current.items()
+            # records are immutable and compared by value
+            if previous.get(key) != service
+        }
+        changed.update(previous.keys() - current.keys())
+        return changed
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update listeners, skipping service listeners whose service did not change.
+
+        Listeners registered with a (app_id, service_name) context are only called when
+        that service changed, or when the availability or staleness of the data changed.
+        When the refresh returned exactly the previous state, only the listeners
+        registered with the EVERY_REFRESH context are called.
+        """
+        notified = (self.last_update_success, self.stale)
+        notify_all = self._notified != notified
+        self._notified = notified
+        skip = self.unchanged and not notify_all
+        for update_callback, context in list(self._listeners.values()):
+            if context == self.EVERY_REFRESH or (
+                not skip
+                and (notify_all or context is None or context in self.changed_services)
+            ):
+                update_callback()
+
+    @callback
+    def _async_update_service_listeners(self, key: ServiceKey) -> None:
+        """Update the listeners of one service, whose shown status changed between refreshes."""
+        for update_callback, context in list(self._listeners.values()):
+            if context == key:
+                update_callback()
+
+    @classmethod
+    def is_service_transitional(cls, service: BalenaService) -> bool:
+        """Return True if the service is still moving between steady states."""
+        return (
+            service.download_progress is not None
+            or service.status in cls._TRANSITIONAL_STATUSES
+        )
+
+    @callback
+    def _adapt_update_interval(self, data: BalenaSupervisorState) -> None:
+        """Pick the next refresh interval from the services in the latest state.
+
+        Poll fast while any service is transitioning, otherwise back off
+        geometrically from the current interval up to the default one.
+        """
+        transitional = [
+            service_name
+            for (_, service_name), service in data.services.items()
+            if self.is_service_transitional(service)
+        ]
+        if transitional:
+            interval = self._TRANSITION_UPDATE_INTERVAL
+            self.update_reason = f"transitional: {', '.join(transitional)}"
+        else:
+            steady = (
+                max(self._PUSH_UPDATE_INTERVAL, self._default_update_interval)
+                if self.push_connected
+                else self._default_update_interval
+            )
+            current = self.update_interval or self._default_update_interval
+            interval = min(current * self._BACKOFF_FACTOR, steady)
+            self.update_reason = "steady" if interval == steady else "backoff"
+
+        if interval != self.update_interval:
+            _LOGGER.debug(
+                "Polling Balena Supervisor every %s (%s)", interval, self.update_reason
+            )
+        self.update_interval = interval
+
+    @callback
+    def async_set_push_connected(self, connected: bool) -> None:
+        """Poll slower while statuses are pushed, back to the default once they are not."""
+        if connected == self.push_connected:
+            return
+        self.push_connected = connected
+        if not connected and self.update_interval > self._default_update_interval:
+            self.update_interval = self._default_update_interval
+            self.update_reason = "push lost"
+            self._schedule_refresh()
+
+    @callback
+    def async_push_service_status(self, key: ServiceKey, status: str) -> bool:
+        """Set the status of one service from a pushed event, without polling.
+
+        Only that service's listeners are notified. The poll timer and pending
+        refresh requests are kept, unlike with async_set_updated_data, so a steady
+        stream of events does not postpone them. Return False if the service is
+        unknown, a refresh is then needed to learn about it.
+        """
+        if self.data is None or (service := self.data.services.get(key)) is None:
+            return False
+        if service.status == status:
+            return True
+
+        # a new state object, the previous one may be reused by the client cache
+        data = BalenaSupervisorState(
+            self.data.apps,
+            {**self.data.services, key: dataclasses.replace(service, status=status)},
+        )
+        self.changed_services = {key}
+        self.added_services = set()
+        self.removed_services = set()
+        self.unchanged = False
+        self.changed_services |= self.optimistic.async_reconcile(data.services)
+        self._async_record_status_history(data, (key,))
+        previous_interval = self.update_interval
+        self._adapt_update_interval(data)
+        self.data = data
+        self.async_update_listeners()
+        # poll sooner while the pushed status is transitional, never later
+        if self.update_interval < previous_interval:
+            self._schedule_refresh()
+        return True
+
+    @callback
+    def _async_record_status_history(
+        self, data: BalenaSupervisorState, service_keys: Iterable[ServiceKey]
     ) -> None:
-        """Temporarily increase refresh rate to every interval for duration."""
-        if self._burst_unsub is not None:
-            self._burst_unsub()
-            self._burst_unsub = None
+        """Record the statuses of changed services, and fire an event per new crash loop."""
+        started = self.status_history.record(data.services, service_keys)
+        if self.status_history.crash_looping:
+            # a new restart postpones the end of the crash loop
+            self._async_schedule_crash_loop_end()
+        for app_id, service_name in started:
+            restarts = self.status_history.restarts_in_window((app_id, service_name))
+            _LOGGER.warning(
+                "Service %s of app %s is crash looping: %d restarts within %s",
+                service_name,
+                app_id,
+                restarts,
+                self._CRASH_LOOP_WINDOW,
+            )
+            self.hass.bus.async_fire(
+                EVENT_CRASH_LOOP,
+                {
+                    "config_entry_id": self.config_entry.entry_id,
+                    "app_id": app_id,
+                    "service_name": service_name,
+                    "restarts": restarts,
+                    "window": self._CRASH_LOOP_WINDOW.total_seconds(),
+                },
+            )
+
+    @callback
+    def _async_schedule_crash_loop_end(self) -> None:
+        """Update the restarts of services once their crash loop ends, no sample shows it."""
+        if self._cancel_crash_loop_end is not None:
+            self._cancel_crash_loop_end()
+            self._cancel_crash_loop_end = None
+        if (end := self.status_history.crash_loop_end()) is None:
+            return
+        self._cancel_crash_loop_end = async_call_later(
+            self.hass,
+            max(end - time.time(), 0),
+            HassJob(self._async_end_crash_loops, cancel_on_shutdown=True),
+        )
+
+    @callback
+    def _async_end_crash_loops(self, _now: object) -> None:
+        self._cancel_crash_loop_end = None
+        for key in self.status_history.expire():
+            self._async_update_service_listeners(key)
+        self._async_schedule_crash_loop_end()
 
+    @callback
+    def _slow_down_while_unhealthy(self) -> None:
+        """Poll no faster than the circuit breaker reset timeout while it is open."""
+        breaker = self.client.circuit_breaker
+        if not breaker.is_open:
+            return
+        interval = max(
+            self.update_interval or self._default_update_interval,
+            timedelta(seconds=breaker.reset_timeout),
+        )
+        if interval != self.update_interval:
+            _LOGGER.debug("Polling Balena Supervisor every %s (unhealthy)", interval)
         self.update_interval = interval
-        self.async_update_listeners()  # Notify listeners of interval change
+        self.update_reason = "unhealthy"
+
+    async def post_container_service(
+        self, app_id: int, service_name: str, action: str
+    ) -> None:
+        """Queue post_container_service, then request a debounced refresh and burst refresh interval until services settle.
+
+        The expected transitional status is shown right away, until a pushed event
+        reports a change or the refresh after the action, see OptimisticStatusTracker.
+        """
+        key = (app_id, service_name)
+        if (service := self.get_service_data(app_id, service_name)) is not None:
+            self.optimistic.async_set(key, action, service.status)
+        try:
+            await self.command_queue.async_submit(app_id, service_name, action)
+        except Exception:
+            self.optimistic.async_rollback(key)
+            raise
+        self.optimistic.async_mark_sent(key)
+        self.start_burst_refresh()
+        await self._command_refresh_debouncer.async_call()
 
-        @callback
-        def _restore_interval(now):
-            self.update_interval = self._DEFAULT_UPDATE_INTERVAL
-            self._burst_unsub = None
+    async def post_application_action(self, app_id: int, action: str) -> None:
+        """Call post_application_action, then request a debounced refresh and burst refresh interval until services settle."""
+        await self.client.post_application_action(app_id, action)
+        self.start_burst_refresh()
+        await self._command_refresh_debouncer.async_call()
 
-        self._burst_unsub = async_call_later(self.hass, duration, _restore_interval)
+    async def async_shutdown(self) -> None:
+        """Cancel the pending command refresh and shutdown the coordinator."""
+        self._command_refresh_debouncer.async_shutdown()
+        self.optimistic.async_clear()
+        if self._cancel_crash_loop_end is not None:
+            self._cancel_crash_loop_end()
+            self._cancel_crash_loop_end = None
+        await super().async_shutdown()
 
     @callback
-    def get_service_data(self, service_name: str) -> BalenaServiceState | None:
-        return self.data["services"].get(service_name, None)
+    def start_burst_refresh(self, interval: timedelta = _BURST_UPDATE_INTERVAL) -> None:
+        """Poll every interval, then back off once all services are steady."""
+        self.update_interval = interval
+        self.update_reason = "burst"
+        self._schedule_refresh()
+
+    @callback
+    def get_service_data(
+        self, app_id: int, service_name: str
+    ) -> BalenaService | None:
+        return self.data.services.get((app_id, service_name), None)
+
+    def get_service_status(self, app_id: int, service_name: str) -> str | None:
+        """Return the status to show for a service, the optimistic one first."""
+        if (status := self.optimistic.get((app_id, service_name))) is not None:
+            return status
+        if (service := self.get_service_data(app_id, service_name)) is None:
+            return None
+        return service.status
@@ -0,0 +1,51 @@
+"""Diagnostics support for Balena Docker."""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.core import HomeAssistant
+
+from .types import BalenaDockerConfigEntry
+
+TO_REDACT = {"api_key", "url", "ip_addresses"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, config_entry: BalenaDockerConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    runtime_data = config_entry.runtime_data
+    coordinator = runtime_data.state_coordinator
+    client = runtime_data.api_client
+
+    return async_redact_data(
+        {
+            "entry": {
+                "data": dict(config_entry.data),
+                "options": dict(config_entry.options),
+                "setup_mode": runtime_data.setup_mode,
+                "setup_duration": round(runtime_data.setup_duration, 3),
+            },
+            "coordinator": {
+                "last_update_success": coordinator.last_update_success,
+                "update_interval": coordinator.update_interval.total_seconds(),
+                "update_reason": coordinator.update_reason,
+                "stale": coordinator.stale,
+                "apps": len(coordinator.data.apps) if coordinator.data else 0,
+                "services": len(coordinator.data.services) if coordinator.data else 0,
+                "circuit_breaker_failures": client.circuit_breaker.failures,
+                "circuit_breaker_open": client.circuit_breaker.is_open,
+            },
+            "connection_pool": client.pool_stats.as_dict(),
+            "state_cache": client.state_cache_stats(),
+            "health": asdict(coordinator.health) if coordinator.health else None,
+            # None unless collect_metrics is enabled in the options
+            "metrics": client.metrics.as_dict() if client.metrics else None,
+            "status_history": coordinator.status_history.as_dict(),
+            "state": coordinator.data.as_response() if coordinator.data else None,
+        },
+        TO_REDACT,
+    )
@@ -0,0 +1,31 @@
+"""Shared scheduling for polling a fleet of Balena devices from one Home Assistant."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+
+class FleetScheduler:
+    """Stagger supervisor refreshes across all config entries.
+
+    Coordinators of different devices tend to fire together (after startup, or
+    when their adaptive intervals line up). Refresh starts are spaced by
+    min_spacing seconds, so polling 50+ devices spreads over time instead of
+    spiking the event loop. Nothing is held while requests are in flight, an
+    offline device retrying and timing out never delays the others.
+    """
+
+    def __init__(self, min_spacing: float = 0.05) -> None:
+        """Initialize the scheduler."""
+        self._min_spacing = min_spacing
+        self._next_start = 0.0
+
+    async def async_wait_turn(self) -> None:
+        """Wait for the next staggered start time, before sending requests."""
+        now = time.monotonic()
+        start = max(now, self._next_start)
+        # reserve the start time before sleeping, so waiters queue up in order
+        self._next_start = start + self._min_spacing
+        if start > now:
+            await asyncio.sleep(start - now)
@@ -1,9 +1,14 @@
 """Loading JS resource by sniffing the LovelaceResourceStorageCollection.
 
 Should use API in future development of the component.
+
+The static path and the extra JS URLs are shared by all config entries, they are
+added by the first entry loading them and removed with the last one. URLs carry
+a hash of the module content, so modules are served with cache headers and
+browsers only fetch them again once they changed.
 """
 
-import asyncio
+import hashlib
 import logging
 from pathlib import Path
 
@@ -11,37 +16,60 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.components.http import StaticPathConfig
 from homeassistant.components.frontend import add_extra_js_url, remove_extra_js_url
 
-from .const import JS_MODULES, DOMAIN, JS_URL_PATH
+from .const import DATA_BALENA, JS_MODULES, JS_URL_PATH
 
 _LOGGER = logging.getLogger(__name__)
 
+JS_PATH = Path(__file__).parent / "js"
+
 
 @callback
 def get_js_modules() -> list[str]:
     """Return the list of JS modules."""
 
 
-async def load_js_modules(hass: HomeAssistant) -> list[str]:
-    """Load JS modules for the frontend."""
-    modules = [f"{JS_URL_PATH}/{module}" for module in JS_MODULES]
+def hash_js_modules() -> list[str]:
+    """Return the URL of each JS module with a hash of its content, reads the files."""
+    return [
+        f"{JS_URL_PATH}/{module}?v="
+        + hashlib.sha256((JS_PATH / module).read_bytes()).hexdigest()[:12]
+        for module in JS_MODULES
+    ]
+
+
+async def load_js_modules(hass: HomeAssistant, entry_id: str) -> list[str]:
+    """Load JS modules for the frontend, for one more config entry."""
+    hass_data = hass.data[DATA_BALENA]
 
-    await hass.http.async_register_static_paths(
-        [
-            StaticPathConfig(
-                url_path="/balena_docker",
-                path=str(Path(__file__).parent / "js"),
-                cache_headers=False,
-            )
-        ]
-    )
+    # routes can not be removed, the static path stays until Home Assistant stops
+    if not hass_data.js_static_path_registered:
+        await hass.http.async_register_static_paths(
+            [
+                StaticPathConfig(
+                    url_path=JS_URL_PATH,
+                    path=str(JS_PATH),
+                    cache_headers=True,
+                )
+            ]
+        )
+        hass_data.js_static_path_registered = True
 
-    for module in modules:
-        add_extra_js_url(hass, module)
+    if not hass_data.js_module_entries:
+        hass_data.js_modules = await hass.async_add_executor_job(hash_js_modules)
+        for module in hass_data.js_modules:
+            add_extra_js_url(hass, module)
+        _LOGGER.debug("Added JS modules %s", hass_data.js_modules)
+    hass_data.js_module_entries.add(entry_id)
 
-    return modules
+    return hass_data.js_modules
 
 
-async def unload_js_modules(hass: HomeAssistant, modules: list[str]) -> None:
-    """Unload JS modules for the frontend."""
-    for module in modules:
+async def unload_js_modules(hass: HomeAssistant, entry_id: str) -> None:
+    """Unload JS modules for the frontend, once no config entry uses them."""
+    hass_data = hass.data[DATA_BALENA]
+    hass_data.js_module_entries.discard(entry_id)
+    if hass_data.js_module_entries:
+        return
+    for module in hass_data.js_modules:
         remove_extra_js_url(hass, module)
+    hass_data.js_modules = []
@@ -0,0 +1,90 @@
+"""Device health of a Balena device, from the supervisor device endpoints."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import time
+from typing import Any
+
+from .types import BalenaDeviceInfo, BalenaStateStatus
+
+
+class FetchPlanner:
+    """Decide which endpoints are due in a refresh cycle, caching their responses.
+
+    An endpoint with a ttl of 0 is fetched on every refresh, others only once
+    their cached response is older than the ttl (in seconds).
+    """
+
+    def __init__(self, ttls: dict[str, float]) -> None:
+        """Initialize the planner with a ttl per endpoint path."""
+        self._ttls = ttls
+        self._fetched_at: dict[str, float] = {}
+        self.cache: dict[str, Any] = {}
+
+    def plan(self, now: float | None = None) -> list[str]:
+        """Return the endpoints to fetch in this cycle, each at most once."""
+        now = time.monotonic() if now is None else now
+        return [
+            endpoint
+            for endpoint, ttl in self._ttls.items()
+            if endpoint not in self._fetched_at or now - self._fetched_at[endpoint] >= ttl
+        ]
+
+    def record(self, endpoint: str, value: Any, now: float | None = None) -> None:
+        """Cache the response of an endpoint."""
+        self._fetched_at[endpoint] = time.monotonic() if now is None else now
+        self.cache[endpoint] = value
+
+    def invalidate(self, endpoint: str) -> None:
+        """Fetch an endpoint again in the next cycle."""
+        self._fetched_at.pop(endpoint, None)
+
+
+@dataclass(slots=True, frozen=True)
+class BalenaDeviceHealth:
+    """Health of the device, merged from /v1/device, /v2/state/status and /v2/version."""
+
+    update_status: str | None
+    download_progress: float | None
+    ip_addresses: list[str]
+    os_version: str | None
+    supervisor_version: str | None
+
+    @classmethod
+    def from_responses(
+        cls,
+        device: BalenaDeviceInfo | None,
+        status: BalenaStateStatus | None,
+        version: str | None,
+    ) -> BalenaDeviceHealth:
+        """Merge the latest responses, any of them may be missing."""
+        device = device or {}
+        status = status or {}
+
+        download_progress = status.get("overallDownloadProgress")
+        if download_progress is None:
+            download_progress = device.get("download_progress")
+
+        if device.get("update_failed"):
+            update_status = "failed"
+        elif download_progress is not None:
+            update_status = "downloading"
+        elif status.get("appState") == "applying":
+            update_status = "applying"
+        elif device.get("update_downloaded"):
+            update_status = "downloaded"
+        elif device.get("update_pending"):
+            update_status = "pending"
+        elif device or status:
+            update_status = "idle"
+        else:
+            update_status = None
+
+        return cls(
+            update_status=update_status,
+            download_progress=download_progress,
+            ip_addresses=(device.get("ip_address") or "").split(),
+            os_version=device.get("os_version"),
+            supervisor_version=version or device.get("supervisor_version"),
+        )
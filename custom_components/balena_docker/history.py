@@ -0,0 +1,212 @@
+"""Status transition history of services, for uptime, restart counts and crash loops.
+
+Each service keeps its last transitions in fixed size arrays used as a ring
+buffer, plus running totals, so memory does not grow with the uptime of Home
+Assistant. Only transitions that are sampled are seen: a restart between two
+polls is missed unless statuses are pushed, see push.BalenaEventBridge.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable, Iterator, Mapping
+import time
+from typing import Any
+
+from .types import BalenaService, ServiceKey
+
+# status to the code stored in the ring buffer, 0 for any other status
+_STATUS_CODES = {"running": 1, "stopping": 2, "exited": 3, "installing": 4}
+_CODE_STATUSES = {code: status for status, code in _STATUS_CODES.items()}
+_RESTART_FLAG = 0x80  # set on the code of a transition that is a restart
+
+
+class StatusHistory:
+    """Last status transitions of one service, and totals since it is tracked."""
+
+    __slots__ = (
+        "_times",
+        "_codes",
+        "_next",
+        "_size",
+        "tracked_since",
+        "status",
+        "release_id",
+        "changed_at",
+        "restarts",
+        "_running_seconds",
+        "_has_run",
+    )
+
+    def __init__(
+        self, capacity: int, status: str, release_id: int | None, now: float
+    ) -> None:
+        """Initialize the history of a service first seen with status at now."""
+        self._times = array("d", bytes(array("d").itemsize * capacity))
+        self._codes = array("B", bytes(capacity))
+        self._next = 0
+        self._size = 0
+        self.tracked_since = now  # seconds since the epoch, like changed_at
+        self.status = status
+        self.release_id = release_id
+        self.changed_at = now
+        self.restarts = 0  # since tracked
+        self._running_seconds = 0.0  # until changed_at
+        self._has_run = status == "running"
+        self._append(now, _STATUS_CODES.get(status, 0))
+
+    def _append(self, now: float, code: int) -> None:
+        self._times[self._next] = now
+        self._codes[self._next] = code
+        self._next = (self._next + 1) % len(self._times)
+        self._size = min(self._size + 1, len(self._times))
+
+    def add(self, status: str, release_id: int | None, now: float) -> None:
+        """Record the status sampled at now, a transition if it differs from the last one.
+
+        Running again within the same release is a restart, running a new
+        release is an update.
+        """
+        if status == self.status:
+            return
+        if self.status == "running":
+            self._running_seconds += max(now - self.changed_at, 0)
+        restart = status == "running" and self._has_run and release_id == self.release_id
+        if status == "running" and release_id != self.release_id:
+            self.release_id = release_id
+        self._has_run = self._has_run or status == "running"
+        self.restarts += restart
+        self.status = status
+        self.changed_at = now
+        self._append(now, _STATUS_CODES.get(status, 0) | (_RESTART_FLAG if restart else 0))
+
+    def transitions(self) -> Iterator[tuple[float, str | None, bool]]:
+        """Yield the (time, status, restart) of the buffered transitions, oldest first."""
+        capacity = len(self._times)
+        start = (self._next - self._size) % capacity
+        for index in range(start, start + self._size):
+            code = self._codes[index % capacity]
+            yield (
+                self._times[index % capacity],
+                _CODE_STATUSES.get(code & ~_RESTART_FLAG),
+                bool(code & _RESTART_FLAG),
+            )
+
+    def restarts_since(self, since: float) -> int:
+        """Return the buffered restarts at or after since."""
+        return sum(
+            restart for changed_at, _, restart in self.transitions() if changed_at >= since
+        )
+
+    def uptime(self, now: float) -> float | None:
+        """Return the percentage of time running since tracked, None right after."""
+        tracked = now - self.tracked_since
+        if tracked <= 0:
+            return None
+        running = self._running_seconds
+        if self.status == "running":
+            running += max(now - self.changed_at, 0)
+        return min(running / tracked * 100, 100.0)
+
+
+class StatusHistoryTracker:
+    """Status history of every service, and detection of crash loops.
+
+    A service is in a crash loop once it restarted crash_loop_threshold times
+    within crash_loop_window seconds, and until it did not for long enough:
+    expire must be called at crash_loop_end, no sample shows it.
+    """
+
+    def __init__(
+        self, crash_loop_threshold: int, crash_loop_window: float, capacity: int = 32
+    ) -> None:
+        """Initialize the tracker, the buffers must hold more restarts than the threshold."""
+        self.crash_loop_threshold = crash_loop_threshold
+        self.crash_loop_window = crash_loop_window
+        # a restart is at least two transitions
+        self._capacity = max(capacity, crash_loop_threshold * 2 + 1)
+        self._histories: dict[ServiceKey, StatusHistory] = {}
+        self.crash_looping: set[ServiceKey] = set()
+
+    def get(self, service_key: ServiceKey) -> StatusHistory | None:
+        """Return the history of a service, None before it was sampled."""
+        return self._histories.get(service_key)
+
+    def record(
+        self,
+        services: Mapping[ServiceKey, BalenaService],
+        service_keys: Iterable[ServiceKey],
+        now: float | None = None,
+    ) -> list[ServiceKey]:
+        """Record the statuses of the services of service_keys, all new ones included.
+
+        Return the services whose crash loop started with this sample.
+        """
+        now = time.time() if now is None else now
+        started = []
+        for key in service_keys:
+            if (service := services.get(key)) is None:
+                continue
+            if (history := self._histories.get(key)) is None:
+                self._histories[key] = StatusHistory(
+                    self._capacity, service.status, service.release_id, now
+                )
+                continue
+            history.add(service.status, service.release_id, now)
+            if key not in self.crash_looping and self.restarts_in_window(key, now) >= (
+                self.crash_loop_threshold
+            ):
+                self.crash_looping.add(key)
+                started.append(key)
+        return started
+
+    def expire(self, now: float | None = None) -> list[ServiceKey]:
+        """End the crash loops whose restarts got out of the window, and return their services."""
+        now = time.time() if now is None else now
+        ended = [
+            key
+            for key in self.crash_looping
+            if self.restarts_in_window(key, now) < self.crash_loop_threshold
+        ]
+        self.crash_looping.difference_update(ended)
+        return ended
+
+    def crash_loop_end(self) -> float | None:
+        """Return when the first crash loop ends without any new restart, None without crash loops."""
+        ends = []
+        for key in self.crash_looping:
+            if (history := self._histories.get(key)) is None:
+                continue
+            restarts = [changed_at for changed_at, _, restart in history.transitions() if restart]
+            # the loop ends once the oldest of the last threshold restarts leaves the window
+            if len(restarts) < self.crash_loop_threshold:
+                return 0.0
+            ends.append(restarts[-self.crash_loop_threshold] + self.crash_loop_window)
+        return min(ends, default=None)
+
+    def retain(self, service_keys: Iterable[ServiceKey]) -> None:
+        """Drop the histories of services that no longer exist."""
+        for service_key in self._histories.keys() - service_keys:
+            del self._histories[service_key]
+            self.crash_looping.discard(service_key)
+
+    def restarts_in_window(self, service_key: ServiceKey, now: float | None = None) -> int:
+        """Return the restarts of a service within the crash loop window."""
+        if (history := self._histories.get(service_key)) is None:
+            return 0
+        now = time.time() if now is None else now
+        return history.restarts_since(now - self.crash_loop_window)
+
+    def as_dict(self, now: float | None = None) -> dict[str, Any]:
+        """Return a summary per service for diagnostics."""
+        now = time.time() if now is None else now
+        return {
+            f"{app_id}/{service_name}": {
+                "status": history.status,
+                "uptime": history.uptime(now),
+                "restarts": history.restarts,
+                "seconds_since_change": round(now - history.changed_at, 1),
+                "crash_loop": (app_id, service_name) in self.crash_looping,
+            }
+            for (app_id, service_name), history in self._histories.items()
+        }
@@ -3,7 +3,46 @@ import { LitElement, html, css, nothing } from "https://cdn.jsdelivr.net/npm/lit
 class MoreInfoBalendDocker extends LitElement {
 
   static get properties() {
-    return { hass: {}, stateObj: {} };
+    return { hass: {}, stateObj: {}, _logs: { state: true } };
+  }
+
+  static MAX_LOG_LINES = 200;
+
+  constructor() {
+    super();
+    this._logs = [];
+  }
+
+  updated(changedProps) {
+    // follow the logs of the shown container, once per container
+    if (changedProps.has("stateObj") && this.hass && this.stateObj
+        && this.stateObj.entity_id !== this._logsEntityId) {
+      this._unsubscribeLogs();
+      this._logsEntityId = this.stateObj.entity_id;
+      this._logs = [];
+      this._logsUnsub = this.hass.connection.subscribeMessage(
+        (entry) => this._addLog(entry),
+        { type: "balena_docker/subscribe_logs", entity_id: this._logsEntityId },
+      );
+    }
+  }
+
+  disconnectedCallback() {
+    super.disconnectedCallback();
+    this._unsubscribeLogs();
+  }
+
+  _unsubscribeLogs() {
+    if (this._logsUnsub) {
+      this._logsUnsub.then((unsub) => unsub()).catch(() => {});
+      this._logsUnsub = undefined;
+    }
+    this._logsEntityId = undefined;
+  }
+
+  _addLog(entry) {
+    const time = new Date(entry.timestamp * 1000).toLocaleTimeString();
+    this._logs = [...this._logs, `${time} ${entry.message}`].slice(-MoreInfoBalendDocker.MAX_LOG_LINES);
   }
 
 
@@ -16,6 +55,7 @@ class MoreInfoBalendDocker extends LitElement {
           <ha-button @click=${() => this._callWs("stop-service")}>Stop</ha-button>
           <ha-button @click=${() => this._callWs("restart-service")}>Restart</ha-button>
         </div>
+        <pre style="margin: 0 16px 16px; max-height: 300px; overflow: auto; font-size: 12px;">${this._logs.join("\n")}</pre>
     `;
   }
 
@@ -0,0 +1,157 @@
+"""Live container logs of a Balena device, read from the supervisor journal.
+
+The journal is followed through a single stream per device, only while someone
+is subscribed, and the recent entries of each service are kept in bounded ring
+buffers so a new subscriber gets some context without reading the whole log.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict, deque
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+import logging
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util.json import JSON_DECODE_EXCEPTIONS, json_loads
+
+if TYPE_CHECKING:
+    from .coordinator import BalenaSupervisorApiClient
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(slots=True, frozen=True)
+class JournalLogEntry:
+    """A journal entry written by a container."""
+
+    timestamp: float  # seconds since the epoch
+    service_name: str
+    message: str
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the entry as sent to the frontend."""
+        return asdict(self)
+
+
+def parse_journal_entry(line: bytes) -> JournalLogEntry | None:
+    """Parse a line of the json journal, None if it was not written by a container.
+
+    Containers are named {service_name}_{image_id}_{release_id}_{commit} by the
+    supervisor, and service names may contain underscores.
+    """
+    try:
+        fields = json_loads(line)
+    except JSON_DECODE_EXCEPTIONS:
+        return None
+    if not isinstance(fields, dict) or not (container := fields.get("CONTAINER_NAME")):
+        return None
+
+    message = fields.get("MESSAGE", "")
+    if isinstance(message, list):
+        # journald sends messages that are not valid utf-8 as a list of bytes
+        message = bytes(message).decode(errors="replace")
+    return JournalLogEntry(
+        timestamp=int(fields.get("__REALTIME_TIMESTAMP", 0)) / 1_000_000,
+        service_name=container.rsplit("_", 3)[0],
+        message=message,
+    )
+
+
+class ServiceLogBuffer:
+    """Ring buffer of the most recent log entries of each service."""
+
+    def __init__(self, size: int) -> None:
+        """Initialize empty buffers holding size entries per service."""
+        self._entries: defaultdict[str, deque[JournalLogEntry]] = defaultdict(
+            lambda: deque(maxlen=size)
+        )
+
+    def append(self, entry: JournalLogEntry) -> None:
+        """Add an entry, dropping the oldest one of its service when full."""
+        self._entries[entry.service_name].append(entry)
+
+    def get(self, service_name: str) -> list[JournalLogEntry]:
+        """Return the buffered entries of a service, oldest first."""
+        if service_name not in self._entries:
+            return []
+        return list(self._entries[service_name])
+
+
+class BalenaLogStream:
+    """Follow the journal of a device while any service has a subscriber.
+
+    Entries are read one line at a time as they are dispatched, so a slow
+    consumer pauses reading from the supervisor instead of growing a buffer.
+    The stream is reconnected after _RECONNECT_DELAY seconds if it breaks.
+    """
+
+    _BUFFER_SIZE = 200
+    _RECONNECT_DELAY = 5
+    # seconds without any entry before reconnecting, the connection may have dropped silently
+    _IDLE_TIMEOUT = 5 * 60
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        client: BalenaSupervisorApiClient,
+    ) -> None:
+        """Initialize the log stream of a device, not following until subscribed."""
+        self.hass = hass
+        self.config_entry = config_entry
+        self.client = client
+        self.buffer = ServiceLogBuffer(self._BUFFER_SIZE)
+        self._subscribers: defaultdict[
+            str, set[Callable[[JournalLogEntry], None]]
+        ] = defaultdict(set)
+        self._task: asyncio.Task | None = None
+        # of the last entry read, kept across reconnects and resubscriptions
+        self._last_timestamp: float | None = None
+
+    @callback
+    def async_subscribe(
+        self, service_name: str, log_callback: Callable[[JournalLogEntry], None]
+    ) -> CALLBACK_TYPE:
+        """Call log_callback with every new entry of a service, return the unsubscribe."""
+        self._subscribers[service_name].add(log_callback)
+        if self._task is None:
+            self._task = self.config_entry.async_create_background_task(
+                self.hass, self._async_follow(), "balena_docker journal logs"
+            )
+
+        @callback
+        def unsubscribe() -> None:
+            self._subscribers[service_name].discard(log_callback)
+            if not self._subscribers[service_name]:
+                del self._subscribers[service_name]
+            if not self._subscribers and self._task is not None:
+                self._task.cancel()
+                self._task = None
+
+        return unsubscribe
+
+    async def _async_follow(self) -> None:
+        while True:
+            # resume after the buffered entries, the journal replays recent ones otherwise
+            last_timestamp = self._last_timestamp
+            try:
+                async for entry in self.client.stream_journal_logs(
+                    count=self._BUFFER_SIZE if last_timestamp is None else 0,
+                    since=last_timestamp,
+                    idle_timeout=self._IDLE_TIMEOUT,
+                ):
+                    # since is inclusive
+                    if last_timestamp is not None and entry.timestamp <= last_timestamp:
+                        continue
+                    self._last_timestamp = entry.timestamp
+                    self.buffer.append(entry)
+                    for log_callback in list(self._subscribers.get(entry.service_name, ())):
+                        log_callback(entry)
+            except UpdateFailed as err:
+                _LOGGER.debug("Journal log stream failed: %s", err)
+            await asyncio.sleep(self._RECONNECT_DELAY)
@@ -0,0 +1,135 @@
+"""Latency, error and payload metrics of the supervisor API, collected when enabled.
+
+Collection is off by default: the client and coordinator then hold None instead
+of an ApiMetrics and skip all bookkeeping.
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+import re
+from typing import Any
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+class LatencyHistogram:
+    """Fixed bucket histogram of durations, backed by a compact array."""
+
+    __slots__ = ("_counts", "count", "total", "max")
+
+    BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self) -> None:
+        """Initialize an empty histogram, the last bucket counts overflows."""
+        self._counts = array("L", bytes(array("L").itemsize * (len(self.BOUNDS_MS) + 1)))
+        self.count = 0
+        self.total = 0.0  # seconds
+        self.max = 0.0
+
+    def add(self, duration: float) -> None:
+        """Count a duration, in seconds."""
+        self._counts[bisect_left(self.BOUNDS_MS, duration * 1000)] += 1
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+
+    def percentile(self, percent: float) -> float | None:
+        """Return the upper bound of the bucket holding the percentile, in milliseconds."""
+        if not self.count:
+            return None
+        rank = self.count * percent / 100
+        seen = 0
+        for bound, bucket_count in zip(self.BOUNDS_MS, self._counts, strict=False):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return round(self.max * 1000, 1)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the buckets and a summary, in milliseconds."""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 1) if self.count else None,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "max_ms": round(self.max * 1000, 1),
+            "buckets": dict(
+                zip(
+                    [f"le_{bound}ms" for bound in self.BOUNDS_MS]
+                    + [f"gt_{self.BOUNDS_MS[-1]}ms"],
+                    self._counts,
+                    strict=True,
+                )
+            ),
+        }
+
+
+class EndpointMetrics:
+    """Metrics of one endpoint of the supervisor API."""
+
+    __slots__ = ("latency", "errors", "payload_bytes", "last_payload_bytes")
+
+    def __init__(self) -> None:
+        """Initialize empty metrics."""
+        self.latency = LatencyHistogram()
+        self.errors = 0
+        self.payload_bytes = 0  # all responses
+        self.last_payload_bytes = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics for diagnostics."""
+        return {
+            "latency": self.latency.as_dict(),
+            "errors": self.errors,
+            "payload_bytes": self.payload_bytes,
+            "last_payload_bytes": self.last_payload_bytes,
+        }
+
+
+class ApiMetrics:
+    """Metrics of all requests to a supervisor, and of the coordinator refreshes."""
+
+    def __init__(self) -> None:
+        """Initialize empty metrics."""
+        self.endpoints: dict[str, EndpointMetrics] = {}
+        self.refresh = LatencyHistogram()
+        self.last_refresh_duration: float | None = None  # seconds
+
+    @staticmethod
+    def endpoint_key(method: str, path: str) -> str:
+        """Return the endpoint of a request, with app ids replaced by a placeholder."""
+        return f"{method} {_ID_SEGMENT.sub('/{id}', path)}"
+
+    def record_request(
+        self, method: str, path: str, duration: float, payload_bytes: int, error: bool
+    ) -> None:
+        """Record one attempt of a request."""
+        key = self.endpoint_key(method, path)
+        if (endpoint := self.endpoints.get(key)) is None:
+            endpoint = self.endpoints[key] = EndpointMetrics()
+        endpoint.latency.add(duration)
+        endpoint.payload_bytes += payload_bytes
+        endpoint.last_payload_bytes = payload_bytes
+        if error:
+            endpoint.errors += 1
+
+    def record_refresh(self, duration: float) -> None:
+        """Record the duration of a coordinator refresh."""
+        self.refresh.add(duration)
+        self.last_refresh_duration = duration
+
+    @property
+    def errors(self) -> int:
+        """Return the errors of all endpoints."""
+        return sum(endpoint.errors for endpoint in self.endpoints.values())
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all metrics for diagnostics."""
+        return {
+            "endpoints": {
+                key: endpoint.as_dict() for key, endpoint in self.endpoints.items()
+            },
+            "refresh": self.refresh.as_dict(),
+        }
@@ -0,0 +1,126 @@
+"""Optimistic statuses of services, shown between a control action and the supervisor sample."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from functools import partial
+
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .types import BalenaService, ServiceKey
+
+
+@dataclass(slots=True)
+class _PendingStatus:
+    status: str  # shown until reconciled
+    previous: str  # reported by the supervisor when the action was sent
+    cancel_timeout: CALLBACK_TYPE
+    sent: bool = False  # the supervisor answered the action
+
+
+class OptimisticStatusTracker:
+    """Expected transitional status of services, until the supervisor reports a change.
+
+    The status is set when a control action is queued, and cleared when:
+    - a sample shows the service left the status it had before the action,
+    - the first sample after the supervisor answered the action arrives, as
+      the supervisor may only answer once done (restart-service answers once
+      running again, the status it had before),
+    - the action failed (rolled back),
+    - timeout seconds passed without any change (rolled back).
+    on_change is called with the key of a service whose shown status changed
+    outside of a refresh, so its entities can write their state.
+    """
+
+    # (status shown, steady status making the action a no-op) per action
+    ACTIONS = {
+        "start-service": ("installing", "running"),
+        "stop-service": ("stopping", "exited"),
+        "restart-service": ("stopping", None),
+    }
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        on_change: Callable[[ServiceKey], None],
+        timeout: float,
+    ) -> None:
+        """Initialize the tracker without pending statuses."""
+        self.hass = hass
+        self._on_change = on_change
+        self._timeout = timeout
+        self._pending: dict[ServiceKey, _PendingStatus] = {}
+
+    def get(self, key: ServiceKey) -> str | None:
+        """Return the optimistic status of a service, None if there is none."""
+        if (pending := self._pending.get(key)) is None:
+            return None
+        return pending.status
+
+    @callback
+    def async_set(self, key: ServiceKey, action: str, previous: str) -> None:
+        """Show the transitional status expected after sending action to a service."""
+        status, noop_status = self.ACTIONS[action]
+        if previous == noop_status:
+            # the supervisor will not change anything, nothing to reconcile against
+            return
+        self._async_pop(key)
+        self._pending[key] = _PendingStatus(
+            status,
+            previous,
+            async_call_later(
+                self.hass,
+                self._timeout,
+                HassJob(partial(self._async_timeout, key), cancel_on_shutdown=True),
+            ),
+        )
+        self._on_change(key)
+
+    @callback
+    def async_mark_sent(self, key: ServiceKey) -> None:
+        """Drop the status of a service with the next sample, its action was answered."""
+        if (pending := self._pending.get(key)) is not None:
+            pending.sent = True
+
+    @callback
+    def async_rollback(self, key: ServiceKey) -> None:
+        """Show the status reported by the supervisor again, after a failed action."""
+        if self._async_pop(key):
+            self._on_change(key)
+
+    @callback
+    def async_reconcile(
+        self, services: Mapping[ServiceKey, BalenaService]
+    ) -> set[ServiceKey]:
+        """Drop the statuses of services sampled after their action, or which changed since.
+
+        Return the services whose shown status changed, their entities must be written.
+        """
+        reconciled = set()
+        for key, pending in list(self._pending.items()):
+            service = services.get(key)
+            if pending.sent or service is None or service.status != pending.previous:
+                self._async_pop(key)
+                reconciled.add(key)
+        return reconciled
+
+    @callback
+    def async_clear(self) -> None:
+        """Drop all statuses and their timers."""
+        for key in list(self._pending):
+            self._async_pop(key)
+
+    @callback
+    def _async_timeout(self, key: ServiceKey, _now: object) -> None:
+        if key in self._pending:
+            del self._pending[key]
+            self._on_change(key)
+
+    @callback
+    def _async_pop(self, key: ServiceKey) -> bool:
+        if (pending := self._pending.pop(key, None)) is None:
+            return False
+        pending.cancel_timeout()
+        return True
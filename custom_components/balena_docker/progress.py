@@ -0,0 +1,81 @@
+"""Download progress tracking for services being updated by the Balena Supervisor."""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterable
+import time
+
+from .types import ServiceKey
+
+
+class DownloadProgressTracker:
+    """Keep a bounded ring buffer of downloadProgress samples per service.
+
+    Rate and ETA are derived from the oldest and newest sample in the buffer,
+    so a single slow poll does not make them jump around.
+    """
+
+    def __init__(self, max_samples: int = 12) -> None:
+        """Initialize the tracker."""
+        self._max_samples = max_samples
+        self._samples: dict[ServiceKey, deque[tuple[float, float]]] = {}
+
+    @staticmethod
+    def parse_progress(value: int | float | str | None) -> float | None:
+        """Return downloadProgress as a percentage, or None if not downloading."""
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    def add_sample(
+        self,
+        service_key: ServiceKey,
+        value: int | float | str | None,
+        now: float | None = None,
+    ) -> None:
+        """Record the latest downloadProgress of a service."""
+        progress = self.parse_progress(value)
+        if progress is None:
+            self._samples.pop(service_key, None)
+            return
+
+        samples = self._samples.get(service_key)
+        if samples is None or progress < samples[-1][1]:
+            # first sample, or progress went backwards for a new image
+            samples = self._samples[service_key] = deque(maxlen=self._max_samples)
+        samples.append((time.monotonic() if now is None else now, progress))
+
+    def retain(self, service_keys: Iterable[ServiceKey]) -> None:
+        """Drop the samples of services that no longer exist."""
+        for service_key in self._samples.keys() - service_keys:
+            del self._samples[service_key]
+
+    @property
+    def active(self) -> bool:
+        """Return True if any service has an active download."""
+        return bool(self._samples)
+
+    def is_downloading(self, service_key: ServiceKey) -> bool:
+        """Return True if the service has an active download."""
+        return service_key in self._samples
+
+    def rate(self, service_key: ServiceKey) -> float | None:
+        """Return the download rate in percent per second."""
+        samples = self._samples.get(service_key)
+        if not samples or len(samples) < 2:
+            return None
+        (first_time, first_progress), (last_time, last_progress) = samples[0], samples[-1]
+        if last_time <= first_time:
+            return None
+        return (last_progress - first_progress) / (last_time - first_time)
+
+    def eta(self, service_key: ServiceKey) -> float | None:
+        """Return the estimated seconds until the download completes."""
+        rate = self.rate(service_key)
+        if not rate or rate <= 0:
+            return None
+        return max(0.0, (100 - self._samples[service_key][-1][1]) / rate)
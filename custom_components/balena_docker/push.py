@@ -0,0 +1,120 @@
+"""Push updates of container statuses from the balena engine events.
+
+The engine reports container events (start, die, ...) as they happen, so a
+crash is seen within a second instead of at the next poll. Each event only
+updates the status of its service in the coordinator data; polling continues
+at a slower pace to reconcile everything the events do not cover, such as
+downloads and release updates.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.config_entries import ConfigEntry
+
+from .coordinator import BalenaSupervisorStateCoordinator
+from .resources import BalenaEngineClient
+from .types import ServiceKey
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class BalenaEventBridge:
+    """Apply the container events of the balena engine to the state coordinator."""
+
+    # docker event action to the status reported by the supervisor
+    _EVENT_STATUSES = {
+        "create": "installing",
+        "start": "running",
+        "kill": "stopping",
+        "die": "exited",
+        "stop": "exited",
+    }
+    _RECONNECT_DELAY = 10  # seconds
+    # the engine sends nothing while containers are quiet, as long as the reconciliation poll
+    _IDLE_TIMEOUT = 30 * 60
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        coordinator: BalenaSupervisorStateCoordinator,
+        client: BalenaEngineClient,
+    ) -> None:
+        """Initialize the bridge, not connected until started."""
+        self.hass = hass
+        self.config_entry = config_entry
+        self.coordinator = coordinator
+        self.client = client
+        self.events = 0  # events applied since started
+
+    @callback
+    def async_start(self) -> None:
+        """Follow the engine events until the config entry is unloaded."""
+        self.config_entry.async_create_background_task(
+            self.hass, self._async_follow(), "balena_docker engine events"
+        )
+
+    async def _async_follow(self) -> None:
+        while True:
+            try:
+                async for event in self.client.stream_container_events(
+                    self._async_connected, self._IDLE_TIMEOUT
+                ):
+                    self.async_handle_event(event)
+            except aiohttp.ServerTimeoutError:
+                # quiet, or dropped without a reset: reconnect straight away, still
+                # pushed, the refresh on reconnecting catches up with missed events
+                _LOGGER.debug(
+                    "No balena engine event for %ss, reconnecting", self._IDLE_TIMEOUT
+                )
+                continue
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as err:
+                _LOGGER.debug("Balena engine event stream failed: %r", err)
+            self.coordinator.async_set_push_connected(False)
+            await asyncio.sleep(self._RECONNECT_DELAY)
+
+    @callback
+    def _async_connected(self) -> None:
+        _LOGGER.debug("Following the balena engine events")
+        self.coordinator.async_set_push_connected(True)
+        # events may have been missed while disconnected
+        self._async_request_refresh()
+
+    @callback
+    def async_handle_event(self, event: dict[str, Any]) -> None:
+        """Update the service of a container event, or refresh if it is unknown."""
+        attributes = (event.get("Actor") or {}).get("Attributes") or {}
+        try:
+            key: ServiceKey = (
+                int(attributes["io.balena.app-id"]),
+                attributes["io.balena.service-name"],
+            )
+        except (KeyError, TypeError, ValueError):
+            return
+
+        action = event.get("Action") or event.get("status")
+        if (status := self._EVENT_STATUSES.get(action)) is None:
+            if action == "destroy":
+                # the service may be gone for good, only the supervisor knows
+                self._async_request_refresh()
+            return
+
+        self.events += 1
+        if not self.coordinator.async_push_service_status(key, status):
+            # a service of a new release, the supervisor has its details
+            self._async_request_refresh()
+
+    @callback
+    def _async_request_refresh(self) -> None:
+        self.config_entry.async_create_background_task(
+            self.hass,
+            self.coordinator.async_request_refresh(),
+            "balena_docker refresh after engine event",
+        )
@@ -0,0 +1,273 @@
+"""Container resource metrics (CPU, memory, network) read from the balena engine.
+
+The supervisor API does not report per-container resource usage, so metrics are
+read from the engine socket (enabled with the io.balena.features.balena-socket
+label). Each refresh lists the containers once, then fetches one-shot stats of
+all running containers concurrently in a single pass.
+"""
+
+from __future__ import annotations
+
+from array import array
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field
+from datetime import timedelta
+import logging
+import os
+from typing import Any
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.update_coordinator import (
+    DataUpdateCoordinator,
+    UpdateFailed,
+)
+from homeassistant.util.json import json_loads
+
+from .types import ServiceKey
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_ENGINE_SOCKET = "/var/run/balena-engine.sock"
+
+
+@callback
+def get_engine_address() -> tuple[str | None, str]:
+    """Return the engine socket path and base url, from DOCKER_HOST if set.
+
+    The socket path is None for a tcp:// DOCKER_HOST, e.g. the mock supervisor
+    standing in for the engine events.
+    """
+    docker_host = os.getenv("DOCKER_HOST", "")
+    if docker_host.startswith("tcp://"):
+        return None, f"http://{docker_host.removeprefix('tcp://')}"
+    if docker_host.startswith("unix://"):
+        return docker_host.removeprefix("unix://"), "http://localhost"
+    return DEFAULT_ENGINE_SOCKET, "http://localhost"
+
+
+class MetricRingBuffer:
+    """Fixed size ring of float samples, backed by a compact array."""
+
+    __slots__ = ("_values", "_next", "_count")
+
+    def __init__(self, size: int) -> None:
+        """Initialize an empty ring buffer holding size samples."""
+        self._values = array("f", bytes(4 * size))
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        """Return the number of samples in the buffer."""
+        return self._count
+
+    def append(self, value: float) -> None:
+        """Add a sample, overwriting the oldest one when full."""
+        self._values[self._next] = value
+        self._next = (self._next + 1) % len(self._values)
+        self._count = min(self._count + 1, len(self._values))
+
+    def values(self) -> list[float]:
+        """Return the samples, oldest first."""
+        if self._count < len(self._values):
+            return self._values[: self._count].tolist()
+        return (self._values[self._next :] + self._values[: self._next]).tolist()
+
+    def latest(self) -> float | None:
+        """Return the most recent sample."""
+        if not self._count:
+            return None
+        return self._values[self._next - 1]
+
+
+@dataclass(slots=True)
+class ServiceResources:
+    """Resource usage history of a service, latest sample last."""
+
+    cpu_percent: MetricRingBuffer
+    memory: MetricRingBuffer  # bytes
+    network_rx: MetricRingBuffer  # bytes since the container started
+    network_tx: MetricRingBuffer
+    # cumulative counters of the previous sample, to derive the CPU usage
+    last_cpu: tuple[int, int] | None = field(default=None)
+
+
+class BalenaEngineClient:
+    """Client reading container metrics from the balena engine API."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        request_timeout: float = 10,
+        base_url: str = "http://localhost",
+    ) -> None:
+        """Initialize the client, session must be connected to the engine socket."""
+        self.session = session
+        self._timeout = aiohttp.ClientTimeout(total=request_timeout)
+        self._base_url = base_url
+
+    async def _get_json(self, path: str, **params) -> object:
+        async with self.session.get(
+            f"{self._base_url}{path}", params=params, timeout=self._timeout
+        ) as resp:
+            resp.raise_for_status()
+            return await resp.json()
+
+    async def stream_container_events(
+        self,
+        on_connected: Callable[[], None] | None = None,
+        idle_timeout: float | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield the events of balena containers as the engine reports them.
+
+        on_connected is called once the engine accepted the stream. The stream
+        never completes, only the connection is bounded by the timeout, and
+        reads by idle_timeout: aiohttp.ServerTimeoutError is raised once no
+        event was read for that long, the connection may have silently dropped.
+        """
+        async with self.session.get(
+            f"{self._base_url}/events",
+            params={
+                "filters": '{"type":["container"],"label":["io.balena.service-name"]}'
+            },
+            timeout=aiohttp.ClientTimeout(
+                total=None, connect=self._timeout.total, sock_read=idle_timeout
+            ),
+        ) as resp:
+            resp.raise_for_status()
+            if on_connected is not None:
+                on_connected()
+            async for line in resp.content:
+                if line.strip():
+                    yield json_loads(line)
+
+    async def get_running_containers(self) -> dict[ServiceKey, str]:
+        """Return the container id of each running service."""
+        containers = await self._get_json(
+            "/containers/json", filters='{"label":["io.balena.service-name"]}'
+        )
+        result = {}
+        for container in containers:
+            labels = container.get("Labels") or {}
+            try:
+                key = (int(labels["io.balena.app-id"]), labels["io.balena.service-name"])
+            except (KeyError, ValueError):
+                continue
+            result[key] = container["Id"]
+        return result
+
+    async def get_stats(self, container_id: str) -> dict:
+        """Return a single stats sample of a container."""
+        return await self._get_json(
+            f"/containers/{container_id}/stats", stream="false", **{"one-shot": "true"}
+        )
+
+
+class BalenaResourceCoordinator(DataUpdateCoordinator[dict[ServiceKey, ServiceResources]]):
+    """Collect resource metrics of all services in one pass, slower than the state."""
+
+    _HISTORY_SIZE = 30
+    _STATS_CONCURRENCY = 8
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        client: BalenaEngineClient,
+        update_interval: timedelta = timedelta(seconds=60),
+    ) -> None:
+        """Initialize the resource coordinator."""
+        super().__init__(
+            hass,
+            logger=_LOGGER,
+            name="balena_engine_resources",
+            update_interval=update_interval,
+            config_entry=config_entry,
+            update_method=self._async_update_data,
+        )
+        self.client = client
+        self._resources: dict[ServiceKey, ServiceResources] = {}
+
+    async def _async_update_data(self) -> dict[ServiceKey, ServiceResources]:
+        semaphore = asyncio.Semaphore(self._STATS_CONCURRENCY)
+
+        async def _get_stats(container_id: str) -> dict:
+            async with semaphore:
+                return await self.client.get_stats(container_id)
+
+        try:
+            containers = await self.client.get_running_containers()
+            samples = await asyncio.gather(
+                *(_get_stats(container_id) for container_id in containers.values()),
+                return_exceptions=True,
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            raise UpdateFailed(f"Error communicating with balena engine: {err!r}") from err
+
+        for key, sample in zip(containers, samples, strict=True):
+            if isinstance(sample, BaseException):
+                _LOGGER.debug("Failed to read stats of %s: %r", key, sample)
+                continue
+            self._add_sample(key, sample)
+
+        # forget services that are gone, keeping memory bounded
+        for key in self._resources.keys() - containers.keys():
+            del self._resources[key]
+        return self._resources
+
+    @callback
+    def _add_sample(self, key: ServiceKey, stats: dict) -> None:
+        """Derive the metrics of a docker stats sample and append them."""
+        resources = self._resources.get(key)
+        if resources is None:
+            resources = self._resources[key] = ServiceResources(
+                *(MetricRingBuffer(self._HISTORY_SIZE) for _ in range(4))
+            )
+
+        cpu_stats = stats.get("cpu_stats") or {}
+        cpu = (
+            cpu_stats.get("cpu_usage", {}).get("total_usage", 0),
+            cpu_stats.get("system_cpu_usage", 0),
+        )
+        if resources.last_cpu is not None:
+            cpu_delta = cpu[0] - resources.last_cpu[0]
+            system_delta = cpu[1] - resources.last_cpu[1]
+            if system_delta > 0 and cpu_delta >= 0:
+                online_cpus = cpu_stats.get("online_cpus") or 1
+                resources.cpu_percent.append(cpu_delta / system_delta * online_cpus * 100)
+        resources.last_cpu = cpu
+
+        memory_stats = stats.get("memory_stats") or {}
+        if "usage" in memory_stats:
+            # exclude the page cache, like `docker stats` does
+            memory_detail = memory_stats.get("stats") or {}
+            cache = memory_detail.get("inactive_file", memory_detail.get("cache", 0))
+            resources.memory.append(memory_stats["usage"] - cache)
+
+        networks = (stats.get("networks") or {}).values()
+        if networks:
+            resources.network_rx.append(sum(net.get("rx_bytes", 0) for net in networks))
+            resources.network_tx.append(sum(net.get("tx_bytes", 0) for net in networks))
+
+
+async def async_create_engine_client(
+    hass: HomeAssistant, request_timeout: float
+) -> BalenaEngineClient | None:
+    """Create a client of the engine, or None if its socket is not mounted.
+
+    The caller must close the session, see session.async_close_session_on_unload.
+    """
+    path, base_url = get_engine_address()
+    if path is None:
+        return BalenaEngineClient(aiohttp.ClientSession(), request_timeout, base_url)
+    if not await hass.async_add_executor_job(os.path.exists, path):
+        _LOGGER.debug("Balena engine socket %s not found, no resource metrics", path)
+        return None
+    return BalenaEngineClient(
+        aiohttp.ClientSession(connector=aiohttp.UnixConnector(path=path)),
+        request_timeout,
+        base_url,
+    )
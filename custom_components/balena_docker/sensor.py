@@ -1,22 +1,47 @@
 """Sensor platform for Balena Docker containers."""
 
 from collections.abc import Callable, Coroutine, Iterable, Mapping
+from datetime import datetime, timedelta
 import os
 import logging
 from typing import Any
 
+from yarl import URL
+
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError, Unauthorized
+from homeassistant.helpers import entity_platform
 from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
-from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfInformation, UnitOfTime
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.util import dt as dt_util, slugify
 
 from .const import DOMAIN, DATA_BALENA
 from .coordinator import BalenaSupervisorStateCoordinator
-from .types import BalenaDockerConfigEntry
+from .history import StatusHistory
+from .metrics import ApiMetrics
+from .resources import BalenaResourceCoordinator, MetricRingBuffer, ServiceResources
+from .types import BalenaDockerConfigEntry, HassData, ServiceKey
 
 _LOGGER = logging.getLogger(__name__)
 
+# only BalenaFleetSummaryEntity is polled, HA reads the interval from the platform module
+SCAN_INTERVAL = timedelta(seconds=30)
+
+# entity service to the action of BelaneDeviceEntity.async_control_application
+APPLICATION_SERVICES = {
+    "restart_application": "restart",
+    "purge_application": "purge",
+}
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: BalenaDockerConfigEntry,
@@ -26,31 +51,292 @@ async def async_setup_entry(
     coordinator = config_entry.runtime_data.state_coordinator
     self_service_name = os.getenv("BALENA_SERVICE_NAME", None)
 
-    entities = []
-    for service_name in coordinator.data["services"]:
-        allow_control_service = True
-        if (
-            config_entry.data.get("disable_self_control")
-            and self_service_name == service_name
-        ):
-            allow_control_service = False
-        entity = BalenaContainerEntity(service_name, coordinator, allow_control_service)
-        entities.append(entity)
-    async_add_entities(entities)
+    if config_entry.data["connection_type"] == "same_device_no_proxy":
+        _async_migrate_unique_ids(hass, coordinator)
+
+    # the app devices are attached to it, it must exist before their entities are added
+    dr.async_get(hass).async_get_or_create(
+        config_entry_id=config_entry.entry_id, **supervisor_device_info(config_entry)
+    )
+
+    entity_sync = BalenaEntitySync(
+        hass, config_entry, async_add_entities, self_service_name
+    )
+    read_only_entities = [
+        entity_class(coordinator)
+        for entity_class in (
+            BalenaUpdateStatusEntity,
+            BalenaOverallDownloadProgressEntity,
+            BalenaIpAddressEntity,
+            BalenaOsVersionEntity,
+            BalenaSupervisorVersionEntity,
+        )
+    ]
+    if config_entry.runtime_data.api_client.metrics is not None:
+        read_only_entities.extend(
+            entity_class(coordinator)
+            for entity_class in (
+                BalenaStateLatencyEntity,
+                BalenaApiErrorsEntity,
+                BalenaRefreshDurationEntity,
+            )
+        )
+    async_add_entities(entity_sync.async_create_entities() + read_only_entities)
+
+    # one fleet summary for all remote devices, owned by one of them
+    if config_entry.data["connection_type"] == "remote":
+        hass_data = hass.data[DATA_BALENA]
+        hass_data.fleet_summary_adders[config_entry.entry_id] = async_add_entities
+        async_add_fleet_summary(hass_data)
 
-    hass.data[DATA_BALENA].add_entities(entities)
+    platform = entity_platform.async_get_current_platform()
+    for service_name in APPLICATION_SERVICES:
+        platform.async_register_entity_service(
+            service_name, {}, _async_handle_application_service
+        )
+
+    # add and remove entities of services appearing or disappearing across releases
+    # called on unchanged refreshes too, to remove services missing for long enough
+    config_entry.async_on_unload(
+        coordinator.async_add_listener(entity_sync.async_sync, coordinator.EVERY_REFRESH)
+    )
 
     return True
 
 
+async def _async_handle_application_service(
+    entity: SensorEntity, call: ServiceCall
+) -> None:
+    """Restart or purge the application of a device entity, restricted to admin users."""
+    if call.context.user_id:
+        user = await entity.hass.auth.async_get_user(call.context.user_id)
+        if user is None or not user.is_admin:
+            raise Unauthorized(context=call.context)
+    if not isinstance(entity, BelaneDeviceEntity):
+        raise ServiceValidationError(f"{entity.entity_id} is not a Balena device")
+    try:
+        await entity.async_control_application(APPLICATION_SERVICES[call.service])
+    except PermissionError as err:
+        raise ServiceValidationError(str(err)) from err
+
+
+class BalenaEntitySync:
+    """Add and remove the entities of services and apps as the supervisor state changes.
+
+    Entities are created per service (or per app, for the device entity) and only
+    the ones of added or removed keys are touched, never the whole set. A key
+    must be missing for _REMOVE_AFTER_MISSING before its entities are removed, as
+    services briefly disappear while a release is applied, when polls are frequent.
+    """
+
+    _REMOVE_AFTER_MISSING = timedelta(minutes=15)
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: BalenaDockerConfigEntry,
+        async_add_entities: AddConfigEntryEntitiesCallback,
+        self_service_name: str | None,
+    ) -> None:
+        """Initialize the entity sync of a config entry."""
+        self.hass = hass
+        self.config_entry = config_entry
+        self.coordinator = config_entry.runtime_data.state_coordinator
+        self._async_add_entities = async_add_entities
+        self._self_service_name = self_service_name
+        # key is a ServiceKey for service entities, the app_id for device entities
+        self._entities: dict[ServiceKey | int, list[SensorEntity]] = {}
+        # when each key was first missing
+        self._missing: dict[ServiceKey | int, datetime] = {}
+        self._synced_refreshes = 0  # coordinator.refreshes at the last sync
+
+    @property
+    def _multi_app(self) -> bool:
+        """Return True to prefix new entity ids with the app name, they could collide.
+
+        Read when entities are created: the registry keeps the ids of existing
+        entities, so the entities of an app added later are prefixed alone.
+        """
+        return len(self.coordinator.data.apps) > 1
+
+    @callback
+    def async_create_entities(self) -> list[SensorEntity]:
+        """Return the entities of keys without entities yet."""
+        data = self.coordinator.data
+        new_entities = []
+        for key in data.services:
+            if key not in self._entities:
+                self._entities[key] = self._create_service_entities(*key)
+                new_entities.extend(self._entities[key])
+        for app_id in data.apps:
+            if app_id not in self._entities:
+                self._entities[app_id] = [self._create_device_entity(app_id)]
+                new_entities.extend(self._entities[app_id])
+        return new_entities
+
+    def _create_service_entities(
+        self, app_id: int, service_name: str
+    ) -> list[SensorEntity]:
+        coordinator = self.coordinator
+        allow_control_service = not (
+            self.config_entry.data.get("disable_self_control")
+            and self._self_service_name == service_name
+        )
+        entities = [
+            BalenaContainerEntity(
+                app_id, service_name, coordinator, allow_control_service, self._multi_app
+            ),
+            BalenaDownloadRateEntity(app_id, service_name, coordinator, self._multi_app),
+            BalenaDownloadEtaEntity(app_id, service_name, coordinator, self._multi_app),
+            BalenaRestartsEntity(app_id, service_name, coordinator, self._multi_app),
+            BalenaUptimeEntity(app_id, service_name, coordinator, self._multi_app),
+            BalenaLastStatusChangeEntity(
+                app_id, service_name, coordinator, self._multi_app
+            ),
+        ]
+        if resource_coordinator := self.config_entry.runtime_data.resource_coordinator:
+            entities.extend(
+                entity_class(
+                    app_id, service_name, coordinator, resource_coordinator, self._multi_app
+                )
+                for entity_class in (
+                    BalenaCpuEntity,
+                    BalenaMemoryEntity,
+                    BalenaNetworkRxEntity,
+                    BalenaNetworkTxEntity,
+                )
+            )
+        return entities
+
+    def _create_device_entity(self, app_id: int) -> SensorEntity:
+        # restarting or purging the whole app would also restart this service
+        app = self.coordinator.data.apps[app_id]
+        allow_control_application = not (
+            self.config_entry.data.get("disable_self_control")
+            and self._self_service_name in app.service_names
+        )
+        return BelaneDeviceEntity(
+            app_id, self.coordinator, allow_control_application, self._multi_app
+        )
+
+    @callback
+    def async_sync(self) -> None:
+        """Add entities of new keys, remove entities of keys missing for long enough."""
+        coordinator = self.coordinator
+        if not coordinator.last_update_success or coordinator.stale:
+            return
+        # pushed statuses also call this listener, only polls show missing keys
+        if coordinator.refreshes == self._synced_refreshes:
+            return
+        self._synced_refreshes = coordinator.refreshes
+        if not (
+            coordinator.added_services or coordinator.removed_services or self._missing
+        ):
+            return
+
+        if new_entities := self.async_create_entities():
+            _LOGGER.info("Adding %d entities of new services", len(new_entities))
+            self._async_add_entities(new_entities)
+
+        current = coordinator.data.services.keys() | coordinator.data.apps.keys()
+        now = dt_util.utcnow()
+        for key in self._entities.keys() - current:
+            missing_since = self._missing.setdefault(key, now)
+            if now - missing_since >= self._REMOVE_AFTER_MISSING:
+                self._async_remove_entities(key)
+        for key in self._missing.keys() & current:
+            del self._missing[key]
+
+    @callback
+    def _async_remove_entities(self, key: ServiceKey | int) -> None:
+        _LOGGER.info("Removing entities of %s, gone from the supervisor state", key)
+        registry = er.async_get(self.hass)
+        for entity in self._entities.pop(key):
+            if entity.registry_entry is not None:
+                # removing the registry entry also removes the entity from hass
+                registry.async_remove(entity.entity_id)
+            elif entity.hass is not None:
+                self.config_entry.async_create_task(self.hass, entity.async_remove())
+        self._missing.pop(key, None)
+
+
+@callback
+def device_prefix(config_entry: BalenaDockerConfigEntry) -> str:
+    """Return the prefix keeping ids of remote devices apart, empty for the local device."""
+    if config_entry.data["connection_type"] != "remote":
+        return ""
+    url = URL(config_entry.data["url"])
+    address = url.host or config_entry.data["url"]
+    # supervisors on one host differ by port, e.g. the fleet mode of the mock
+    if url.host and url.explicit_port is not None:
+        address = f"{address}_{url.explicit_port}"
+    return f"{slugify(address)}_"
+
+
+@callback
+def async_add_fleet_summary(hass_data: HassData) -> None:
+    """Add the fleet summary to the first loaded remote config entry, if no entry owns it."""
+    if hass_data.fleet_summary_entry_id is not None:
+        return
+    for entry_id, async_add_entities in hass_data.fleet_summary_adders.items():
+        hass_data.fleet_summary_entry_id = entry_id
+        async_add_entities([BalenaFleetSummaryEntity(hass_data)])
+        return
+
+
+@callback
+def supervisor_device_info(config_entry: BalenaDockerConfigEntry) -> DeviceInfo:
+    """Return the device of the supervisor, the app devices are attached to it."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, config_entry.entry_id)},
+        name=config_entry.title,
+        manufacturer="balena",
+        model="Supervisor",
+    )
+
+
+@callback
+def _async_migrate_unique_ids(
+    hass: HomeAssistant, coordinator: BalenaSupervisorStateCoordinator
+) -> None:
+    """Migrate container unique ids from before multiple apps were supported."""
+    registry = er.async_get(hass)
+    for app_id, service_name in coordinator.data.services:
+        if entity_id := registry.async_get_entity_id(
+            "sensor", DOMAIN, f"{DOMAIN}_{service_name}"
+        ):
+            registry.async_update_entity(
+                entity_id, new_unique_id=f"{DOMAIN}_{app_id}_{service_name}"
+            )
+
+
 class BalenaBaseEntity(SensorEntity):
     """Base entity for Balena Docker containers."""
 
     _attr_has_entity_name = True
     coordinator: BalenaSupervisorStateCoordinator = None
 
-    def __init__(self) -> None:
-        """Initialize a Balena Docker base entity."""
+    def __init__(
+        self,
+        app_id: int,
+        state_coordinator: BalenaSupervisorStateCoordinator,
+        multi_app: bool,
+    ) -> None:
+        """Initialize a Balena Docker base entity, attached to the device of its app."""
+        self.coordinator = state_coordinator
+        self.app_id = app_id
+        app_name = state_coordinator.data.apps[app_id].app_name
+        prefix = device_prefix(state_coordinator.config_entry)
+        self._object_id_prefix = prefix + (f"{slugify(app_name)}_" if multi_app else "")
+        self._unique_id_prefix = f"{DOMAIN}_{prefix}{app_id}"
+        entry_id = state_coordinator.config_entry.entry_id
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"{entry_id}_{app_id}")},
+            name=app_name,
+            manufacturer="balena",
+            model="Application",
+            via_device=(DOMAIN, entry_id),
+        )
         self._attr_should_poll = False
         self._attr_device_class = SensorDeviceClass.ENUM
         self._attr_options = [
@@ -61,9 +347,16 @@ class BalenaBaseEntity(SensorEntity):
         ]
 
     @property
-    def balena_app_id(self) -> int | None:
+    def balena_app_id(self) -> int:
         """Return the Balena application ID."""
-        return self.coordinator.app_id
+        return self.app_id
+
+    @callback
+    def _async_register_controllable(self) -> None:
+        """Make the websocket commands find this entity, under its final entity_id."""
+        hass_data: HassData = self.hass.data[DATA_BALENA]
+        hass_data.add_entities([self])
+        self.async_on_remove(lambda: hass_data.remove_entity(self))
 
     async def async_update(self) -> None:
         """Update the entity.
@@ -84,51 +377,59 @@ class BalenaContainerEntity(BalenaBaseEntity):
 
     def __init__(
         self,
+        app_id: int,
         service_name: str,
         state_coordinator: BalenaSupervisorStateCoordinator,
         allow_control_service: bool,
+        multi_app: bool = False,
     ) -> None:
         """Initialize a Balena Docker container entity."""
-        super().__init__()
+        super().__init__(app_id, state_coordinator, multi_app)
         self.service_name = service_name
-        self.entity_id = f"{DOMAIN}.{service_name}"
-        self._attr_unique_id = f"{DOMAIN}_{service_name}"
-        self.coordinator = state_coordinator
+        self.entity_id = f"{DOMAIN}.{self._object_id_prefix}{service_name}"
+        self._attr_unique_id = f"{self._unique_id_prefix}_{service_name}"
+        self._attr_name = service_name
         self._allow_control_service = allow_control_service
 
     @property
     def available(self) -> bool:
         """Return if entity is available."""
-        return (
-            self.coordinator.last_update_success
-            and self.coordinator.get_service_data(self.service_name)
+        return self.coordinator.last_update_success and bool(
+            self.coordinator.get_service_data(self.app_id, self.service_name)
         )
 
     @property
     def native_value(self) -> str | None:
-        """Return the state of the container."""
-        service_data = self.coordinator.get_service_data(self.service_name)
-
-        if("status" not in service_data or isinstance(service_data["status"], str) == False):
+        """Return the state of the container, the expected one right after a control action."""
+        status = self.coordinator.get_service_status(self.app_id, self.service_name)
+        if status is None:
             return None
 
-        val = service_data["status"].lower()
-        if val in self._attr_options:
-            return val
+        # already validated and lower cased, see BalenaService.from_response
+        if status in self._attr_options:
+            return status
 
-        _LOGGER.warning("Received unknown status '%s' for service '%s', return None", val, self.service_name)
+        _LOGGER.warning("Received unknown status '%s' for service '%s', return None", status, self.service_name)
         return None
 
     @property
     def extra_state_attributes(self) -> Mapping[str, Any] | None:
         """Return the state attributes."""
-        if service_data := self.coordinator.get_service_data(self.service_name):
+        if service_data := self.coordinator.get_service_data(
+            self.app_id, self.service_name
+        ):
             return {
-                "release_id": service_data["releaseId"],
-                "download_progress": service_data["downloadProgress"],
+                "release_id": service_data.release_id,
+                "download_progress": service_data.download_progress,
+                "stale": self.coordinator.stale,
+                # True until the supervisor reports the result of a control action
+                "optimistic": self.coordinator.optimistic.get(
+                    (self.app_id, self.service_name)
+                )
+                is not None,
                 "custom_ui_more_info": "more-info-balena_docker",
                 "icon": "mdi:play-circle-outline"
-                if service_data["status"] == "Running"
+                if service_data.status == "running"
                 else "mdi:stop-circle-outline",
             }
 
@@ -138,9 +439,13 @@ class BalenaContainerEntity(BalenaBaseEntity):
         await super().async_added_to_hass()
 
         # For HA to display the state immediately after update, async_write_ha_state need to be called
+        # only notified when this service changed, see BalenaSupervisorStateCoordinator.async_update_listeners
         self.async_on_remove(
-            self.coordinator.async_add_listener(self.async_write_ha_state)
+            self.coordinator.async_add_listener(
+                self.async_write_ha_state, (self.app_id, self.service_name)
+            )
         )
+        self._async_register_controllable()
 
     async def async_control_service(self, action: str) -> None:
         """Control the container service (start, stop, restart)."""
@@ -148,20 +453,569 @@ class BalenaContainerEntity(BalenaBaseEntity):
         if not self._allow_control_service:
             raise PermissionError(f"{self.service_name} can not be controlled")
 
-        await self.coordinator.client.post_container_service(
+        # queued and followed by a debounced refresh, see BalenaSupervisorStateCoordinator.post_container_service
+        await self.coordinator.post_container_service(
             app_id=self.balena_app_id, service_name=self.service_name, action=action
         )
-        await self.coordinator.async_refresh()  # Refresh state after command
+
+
+class BalenaDownloadProgressEntity(BalenaBaseEntity):
+    """Base entity for values derived from the downloadProgress of a service."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _key: str
+
+    def __init__(
+        self,
+        app_id: int,
+        service_name: str,
+        state_coordinator: BalenaSupervisorStateCoordinator,
+        multi_app: bool = False,
+    ) -> None:
+        """Initialize a download progress entity."""
+        super().__init__(app_id, state_coordinator, multi_app)
+        self._attr_device_class = None
+        self._attr_options = None
+        self.service_name = service_name
+        self.entity_id = f"{DOMAIN}.{self._object_id_prefix}{service_name}_{self._key}"
+        self._attr_unique_id = f"{self._unique_id_prefix}_{service_name}_{self._key}"
+        self._attr_name = f"{service_name} {self._key.replace('_', ' ')}"
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return self.coordinator.last_update_success and bool(
+            self.coordinator.get_service_data(self.app_id, self.service_name)
+        )
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+
+        # only notified when this service changed, same as BalenaContainerEntity
+        self.async_on_remove(
+            self.coordinator.async_add_listener(
+                self.async_write_ha_state, (self.app_id, self.service_name)
+            )
+        )
+        # a stalled download does not change the service, the rate still drops
+        self.async_on_remove(
+            self.coordinator.async_add_listener(
+                self._async_write_while_downloading, self.coordinator.EVERY_REFRESH
+            )
+        )
+
+    @callback
+    def _async_write_while_downloading(self) -> None:
+        key = (self.app_id, self.service_name)
+        if (
+            self.coordinator.download_progress.is_downloading(key)
+            and key not in self.coordinator.changed_services
+        ):
+            self.async_write_ha_state()
+
+
+class BalenaDownloadRateEntity(BalenaDownloadProgressEntity):
+    """Download rate of the image of a service, in percent per second."""
+
+    _key = "download_rate"
+    _attr_native_unit_of_measurement = "%/s"
+    _attr_suggested_display_precision = 2
+    _attr_icon = "mdi:download"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the download rate, None if not downloading."""
+        return self.coordinator.download_progress.rate((self.app_id, self.service_name))
+
+
+class BalenaDownloadEtaEntity(BalenaDownloadProgressEntity):
+    """Estimated time until the image of a service is downloaded."""
+
+    _key = "download_eta"
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_suggested_display_precision = 0
+    _attr_icon = "mdi:timer-sand"
+
+    def __init__(
+        self,
+        app_id: int,
+        service_name: str,
+        state_coordinator: BalenaSupervisorStateCoordinator,
+        multi_app: bool = False,
+    ) -> None:
+        """Initialize a download ETA entity."""
+        super().__init__(app_id, service_name, state_coordinator, multi_app)
+        self._attr_device_class = SensorDeviceClass.DURATION
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the seconds until the download completes, None if not downloading."""
+        return self.coordinator.download_progress.eta((self.app_id, self.service_name))
+
+
+class BalenaStatusHistoryEntity(BalenaBaseEntity):
+    """Base entity for values derived from the status history of a service.
+
+    The history is in memory only, values start over when Home Assistant restarts.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _key: str
+    # listener context, the service by default
+    _listen_every_refresh = False
+
+    def __init__(
+        self,
+        app_id: int,
+        service_name: str,
+        state_coordinator: BalenaSupervisorStateCoordinator,
+        multi_app: bool = False,
+    ) -> None:
+        """Initialize a status history entity."""
+        super().__init__(app_id, state_coordinator, multi_app)
+        self._attr_device_class = None
+        self._attr_options = None
+        self.service_name = service_name
+        self.entity_id = f"{DOMAIN}.{self._object_id_prefix}{service_name}_{self._key}"
+        self._attr_unique_id = f"{self._unique_id_prefix}_{service_name}_{self._key}"
+        self._attr_name = f"{service_name} {self._key.replace('_', ' ')}"
+
+    @property
+    def _history(self) -> StatusHistory | None:
+        return self.coordinator.status_history.get((self.app_id, self.service_name))
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available, the history is kept while the API is down."""
+        return self._history is not None
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+
+        self.async_on_remove(
+            self.coordinator.async_add_listener(
+                self.async_write_ha_state,
+                self.coordinator.EVERY_REFRESH
+                if self._listen_every_refresh
+                else (self.app_id, self.service_name),
+            )
+        )
+
+
+class BalenaRestartsEntity(BalenaStatusHistoryEntity):
+    """Restarts of a service within the same release, and whether it is crash looping."""
+
+    _key = "restarts"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_icon = "mdi:restart"
+
+    @property
+    def native_value(self) -> int | None:
+        """Return the restarts seen since Home Assistant started."""
+        if (history := self._history) is None:
+            return None
+        return history.restarts
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        """Return the crash loop state, see StatusHistoryTracker.
+
+        Its end is written by the coordinator, without any status change.
+        """
+        key = (self.app_id, self.service_name)
+        tracker = self.coordinator.status_history
+        return {
+            "crash_loop": key in tracker.crash_looping,
+            "recent_restarts": tracker.restarts_in_window(key),
+            "crash_loop_threshold": tracker.crash_loop_threshold,
+        }
+
+
+class BalenaUptimeEntity(BalenaStatusHistoryEntity):
+    """Percentage of time a service was running since Home Assistant started."""
+
+    _key = "uptime"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = PERCENTAGE
+    _attr_suggested_display_precision = 1
+    _attr_icon = "mdi:percent-circle-outline"
+    _attr_entity_registry_enabled_default = False
+    # grows without any status change, written on every refresh
+    _listen_every_refresh = True
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the uptime percentage, None right after the service was first seen."""
+        if (history := self._history) is None:
+            return None
+        return history.uptime(dt_util.utcnow().timestamp())
+
+
+class BalenaLastStatusChangeEntity(BalenaStatusHistoryEntity):
+    """Time of the last status change of a service, the time since it in the frontend."""
+
+    _key = "last_status_change"
+    _attr_icon = "mdi:history"
+    _attr_entity_registry_enabled_default = False
+    _unrecorded_attributes = frozenset({"transitions"})
+
+    def __init__(
+        self,
+        app_id: int,
+        service_name: str,
+        state_coordinator: BalenaSupervisorStateCoordinator,
+        multi_app: bool = False,
+    ) -> None:
+        """Initialize a last status change entity."""
+        super().__init__(app_id, service_name, state_coordinator, multi_app)
+        self._attr_device_class = SensorDeviceClass.TIMESTAMP
+
+    @property
+    def native_value(self):
+        """Return the time of the last status change, or when the service was first seen."""
+        if (history := self._history) is None:
+            return None
+        return dt_util.utc_from_timestamp(history.changed_at)
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        """Return the buffered transitions, oldest first."""
+        if (history := self._history) is None:
+            return None
+        return {
+            "transitions": [
+                {
+                    "time": dt_util.utc_from_timestamp(changed_at).isoformat(),
+                    "status": status,
+                    "restart": restart,
+                }
+                for changed_at, status, restart in history.transitions()
+            ]
+        }
+
+
+class BalenaResourceEntity(BalenaBaseEntity):
+    """Base entity for a resource metric of a service, from BalenaResourceCoordinator.
+
+    The short-term trend is kept in a ring buffer and exposed as an attribute
+    that is not recorded, so it adds no recorder load.
+    """
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _unrecorded_attributes = frozenset({"history"})
+    _key: str
+
+    def __init__(
+        self,
+        app_id: int,
+        service_name: str,
+        state_coordinator: BalenaSupervisorStateCoordinator,
+        resource_coordinator: BalenaResourceCoordinator,
+        multi_app: bool = False,
+    ) -> None:
+        """Initialize a resource metric entity."""
+        super().__init__(app_id, state_coordinator, multi_app)
+        self._attr_device_class = None
+        self._attr_options = None
+        self.service_name = service_name
+        self.resource_coordinator = resource_coordinator
+        self.entity_id = f"{DOMAIN}.{self._object_id_prefix}{service_name}_{self._key}"
+        self._attr_unique_id = f"{self._unique_id_prefix}_{service_name}_{self._key}"
+        self._attr_name = f"{service_name} {self._key.replace('_', ' ')}"
+
+    def _buffer(self, resources: ServiceResources) -> MetricRingBuffer:
+        """Return the ring buffer of this metric."""
+        return getattr(resources, self._key)
+
+    def _convert(self, value: float) -> float:
+        """Convert a raw sample to the unit of the entity."""
+        return value
+
+    @property
+    def _resources(self) -> ServiceResources | None:
+        if not self.resource_coordinator.data:
+            return None
+        return self.resource_coordinator.data.get((self.app_id, self.service_name))
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available, metrics only exist for running containers."""
+        return self.resource_coordinator.last_update_success and (
+            self._resources is not None
+        )
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the latest sample."""
+        if (resources := self._resources) is None:
+            return None
+        value = self._buffer(resources).latest()
+        return None if value is None else round(self._convert(value), 2)
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        """Return the recent samples, oldest first."""
+        if (resources := self._resources) is None:
+            return None
+        return {
+            "history": [
+                round(self._convert(value), 2)
+                for value in self._buffer(resources).values()
+            ]
+        }
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+
+        self.async_on_remove(
+            self.resource_coordinator.async_add_listener(self.async_write_ha_state)
+        )
+
+    async def async_update(self) -> None:
+        """Update the entity, only used by the generic entity update service."""
+        if not self.enabled:
+            return
+
+        await self.resource_coordinator.async_request_refresh()
+
+
+class BalenaCpuEntity(BalenaResourceEntity):
+    """CPU usage of a service, in percent of one CPU times the number of CPUs."""
+
+    _key = "cpu_percent"
+    _attr_native_unit_of_measurement = PERCENTAGE
+    _attr_icon = "mdi:cpu-64-bit"
+
+
+class BalenaDataSizeEntity(BalenaResourceEntity):
+    """Base entity for a resource metric sampled in bytes, shown in MiB."""
+
+    _attr_native_unit_of_measurement = UnitOfInformation.MEBIBYTES
+
+    def __init__(self, *args, **kwargs) -> None:
+        """Initialize a data size entity."""
+        super().__init__(*args, **kwargs)
+        self._attr_device_class = SensorDeviceClass.DATA_SIZE
+
+    def _convert(self, value: float) -> float:
+        return value / 2**20
+
+
+class BalenaMemoryEntity(BalenaDataSizeEntity):
+    """Memory usage of a service, excluding the page cache."""
+
+    _key = "memory"
+    _attr_icon = "mdi:memory"
+
+
+class BalenaNetworkRxEntity(BalenaDataSizeEntity):
+    """Bytes received by a service since its container started."""
+
+    _key = "network_rx"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_icon = "mdi:download-network"
+
+
+class BalenaNetworkTxEntity(BalenaDataSizeEntity):
+    """Bytes sent by a service since its container started."""
+
+    _key = "network_tx"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_icon = "mdi:upload-network"
+
+
+class BalenaHealthEntity(SensorEntity):
+    """Base entity for the health of the device running the supervisor."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _key: str
+    # listener context, only refreshes that changed the state or health by default
+    _listen_every_refresh = False
+
+    def __init__(self, state_coordinator: BalenaSupervisorStateCoordinator) -> None:
+        """Initialize a device health entity, attached to the supervisor device."""
+        self.coordinator = state_coordinator
+        config_entry = state_coordinator.config_entry
+        prefix = device_prefix(config_entry)
+        self.entity_id = f"{DOMAIN}.{prefix}{self._key}"
+        self._attr_unique_id = f"{DOMAIN}_{prefix}{self._key}"
+        self._attr_name = self._key.replace("_", " ").capitalize()
+        self._attr_device_info = supervisor_device_info(config_entry)
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return self.coordinator.last_update_success and self.coordinator.health is not None
+
+    @property
+    def native_value(self) -> Any:
+        """Return the value of this health field."""
+        return getattr(self.coordinator.health, self._key)
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+
+        self.async_on_remove(
+            self.coordinator.async_add_listener(
+                self.async_write_ha_state,
+                self.coordinator.EVERY_REFRESH if self._listen_every_refresh else None,
+            )
+        )
+
+    async def async_update(self) -> None:
+        """Update the entity, only used by the generic entity update service."""
+        if not self.enabled:
+            return
+
+        await self.coordinator.async_request_refresh()
+
+
+class BalenaUpdateStatusEntity(BalenaHealthEntity):
+    """Whether the device is downloading or applying a release."""
+
+    _key = "update_status"
+    _attr_device_class = SensorDeviceClass.ENUM
+    _attr_options = ["idle", "pending", "downloading", "downloaded", "applying", "failed"]
+    _attr_icon = "mdi:update"
+
+
+class BalenaOverallDownloadProgressEntity(BalenaHealthEntity):
+    """Download progress of the whole release."""
+
+    _key = "download_progress"
+    _attr_native_unit_of_measurement = PERCENTAGE
+    _attr_icon = "mdi:download"
+
+
+class BalenaIpAddressEntity(BalenaHealthEntity):
+    """First IP address of the device, all of them as an attribute."""
+
+    _key = "ip_address"
+    _attr_icon = "mdi:ip-network"
+
+    @property
+    def native_value(self) -> str | None:
+        """Return the first IP address."""
+        addresses = self.coordinator.health.ip_addresses
+        return addresses[0] if addresses else None
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        """Return all IP addresses."""
+        if self.coordinator.health is None:
+            return None
+        return {"ip_addresses": self.coordinator.health.ip_addresses}
+
+
+class BalenaOsVersionEntity(BalenaHealthEntity):
+    """Version of balenaOS."""
+
+    _key = "os_version"
+    _attr_icon = "mdi:chip"
+
+
+class BalenaSupervisorVersionEntity(BalenaHealthEntity):
+    """Version of the balena supervisor."""
+
+    _key = "supervisor_version"
+    _attr_icon = "mdi:information-outline"
+
+
+class BalenaMetricsEntity(BalenaHealthEntity):
+    """Base entity for a metric of the supervisor API, only when collect_metrics is on."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    # every request counts, unchanged refreshes too
+    _listen_every_refresh = True
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available, metrics are kept while the API is down."""
+        return True
+
+    @property
+    def _metrics(self) -> ApiMetrics:
+        return self.coordinator.client.metrics
+
+
+class BalenaStateLatencyEntity(BalenaMetricsEntity):
+    """95th percentile latency of the state endpoint, polled on every refresh."""
+
+    _key = "state_latency"
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_icon = "mdi:timer-outline"
+    _unrecorded_attributes = frozenset({"buckets"})
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the 95th percentile, None before the first request."""
+        if (endpoint := self._metrics.endpoints.get("GET /v2/applications/state")) is None:
+            return None
+        return endpoint.latency.percentile(95)
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        """Return the full histogram of the state endpoint."""
+        if (endpoint := self._metrics.endpoints.get("GET /v2/applications/state")) is None:
+            return None
+        return endpoint.as_dict()["latency"]
+
+
+class BalenaApiErrorsEntity(BalenaMetricsEntity):
+    """Failed requests to the supervisor API, including retried attempts."""
+
+    _key = "api_errors"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_icon = "mdi:alert-circle-outline"
+
+    @property
+    def native_value(self) -> int:
+        """Return the errors of all endpoints."""
+        return self._metrics.errors
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        """Return the errors per endpoint."""
+        return {
+            key: endpoint.errors for key, endpoint in self._metrics.endpoints.items()
+        }
+
+
+class BalenaRefreshDurationEntity(BalenaMetricsEntity):
+    """Duration of the last refresh of the supervisor state, all endpoints included."""
+
+    _key = "refresh_duration"
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_icon = "mdi:timer-sync-outline"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the duration of the last refresh."""
+        if (duration := self._metrics.last_refresh_duration) is None:
+            return None
+        return round(duration * 1000, 1)
 
 
 class BelaneDeviceEntity(BalenaBaseEntity):
     """Entity representing the Balena device itself."""
 
-    def __init__(self, state_coordinator: BalenaSupervisorStateCoordinator) -> None:
+    def __init__(
+        self,
+        app_id: int,
+        state_coordinator: BalenaSupervisorStateCoordinator,
+        allow_control_application: bool,
+        multi_app: bool = False,
+    ) -> None:
         """Initialize a Balena Docker device entity."""
-        self.entity_id = f"{DOMAIN}.device"
-        self._attr_unique_id = f"{DOMAIN}_device"
-        self.coordinator = state_coordinator
+        super().__init__(app_id, state_coordinator, multi_app)
+        self._attr_options = ["online", "offline"]
+        self.entity_id = f"{DOMAIN}.{self._object_id_prefix}device"
+        self._attr_unique_id = f"{self._unique_id_prefix}_device"
+        self._attr_name = None  # main feature of the app device
+        self._allow_control_application = allow_control_application
 
     @property
     def available(self) -> bool:
@@ -176,11 +1030,22 @@ class BelaneDeviceEntity(BalenaBaseEntity):
     @property
     def extra_state_attributes(self) -> Mapping[str, Any] | None:
         """Return the state attributes."""
-        if self.coordinator.data:
+        if self.coordinator.data and (app := self.coordinator.data.apps.get(self.app_id)):
             return {
-                "app_id": self.coordinator.data["appId"],
-                "app_name": self.coordinator.data["appName"],
-                "commit": self.coordinator.data["commit"],
+                "app_id": app.app_id,
+                "app_name": app.app_name,
+                "commit": app.commit,
+                "update_interval": self.coordinator.update_interval.total_seconds(),
+                "update_reason": self.coordinator.update_reason,
+                "push_connected": self.coordinator.push_connected,
+                "changed_services": len(self.coordinator.changed_services),
+                **self.coordinator.client.pool_stats.as_dict(),
+                **self.coordinator.client.state_cache_stats(),
+                "stale": self.coordinator.stale,
+                "setup_mode": self.coordinator.config_entry.runtime_data.setup_mode,
+                "setup_duration": round(
+                    self.coordinator.config_entry.runtime_data.setup_duration, 3
+                ),
                 "custom_ui_more_info": "more-info-balena_docker-device",
                 "icon": "mdi:chip",
             }
@@ -191,6 +1056,69 @@ class BelaneDeviceEntity(BalenaBaseEntity):
         await super().async_added_to_hass()
 
         # For HA to display the state immediately after update, async_write_ha_state need to be called
+        # the state_cache_* attributes change on unchanged refreshes too, they are cache hits
         self.async_on_remove(
-            self.coordinator.async_add_listener(self.async_write_ha_state)
+            self.coordinator.async_add_listener(
+                self.async_write_ha_state, self.coordinator.EVERY_REFRESH
+            )
+        )
+        self._async_register_controllable()
+
+    async def async_control_application(self, action: str) -> None:
+        """Control the whole application (restart, purge) in a single request."""
+
+        if not self._allow_control_application:
+            raise PermissionError("the application running Home Assistant can not be controlled")
+
+        await self.coordinator.post_application_action(
+            app_id=self.balena_app_id, action=action
         )
+
+
+class BalenaFleetSummaryEntity(SensorEntity):
+    """Number of Balena devices online, across all config entries.
+
+    Polled on a fixed interval instead of listening to every coordinator, so a
+    large fleet does not write this state on every device refresh.
+    """
+
+    _attr_has_entity_name = True
+    _attr_name = "Balena fleet"
+    _attr_icon = "mdi:devices"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_should_poll = True  # every SCAN_INTERVAL
+
+    def __init__(self, hass_data: HassData) -> None:
+        """Initialize the fleet summary entity."""
+        self._hass_data = hass_data
+        self.entity_id = f"{DOMAIN}.fleet"
+        self._attr_unique_id = f"{DOMAIN}_fleet"
+
+    async def async_update(self) -> None:
+        """Summarize the state of all loaded devices."""
+        devices = online = services = running = 0
+        offline_devices = []
+        for config_entry in self._hass_data.config_entries.values():
+            runtime_data = getattr(config_entry, "runtime_data", None)
+            if runtime_data is None:
+                continue
+            coordinator = runtime_data.state_coordinator
+            devices += 1
+            if not coordinator.last_update_success or coordinator.data is None:
+                offline_devices.append(config_entry.title)
+                continue
+            online += 1
+            services += len(coordinator.data.services)
+            running += sum(
+                1
+                for service in coordinator.data.services.values()
+                if service.status == "running"
+            )
+
+        self._attr_native_value = online
+        self._attr_extra_state_attributes = {
+            "devices": devices,
+            "offline_devices": offline_devices,
+            "services": services,
+            "running_services": running,
+        }
@@ -0,0 +1,108 @@
+"""Dedicated aiohttp session for the Balena Supervisor API.
+
+The supervisor is reached over localhost (or the LAN), so it gets its own small
+connection pool with long keep-alive, instead of queueing behind other
+integrations on Home Assistant's shared session.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import time
+from types import SimpleNamespace
+
+import aiohttp
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import APPLICATION_NAME, EVENT_HOMEASSISTANT_CLOSE, __version__
+from homeassistant.core import Event, HomeAssistant, callback
+
+_CONNECTION_LIMIT = 4
+_KEEPALIVE_TIMEOUT = 60  # seconds, the supervisor keeps idle sockets around
+_DNS_CACHE_TTL = 300  # seconds
+
+
+@dataclass
+class ConnectionPoolStats:
+    """Counters collected from aiohttp tracing on the supervisor session."""
+
+    pool_hits: int = 0  # requests served by an idle keep-alive connection
+    new_connections: int = 0
+    queued: int = 0  # requests that had to wait for a free connection
+    wait_time: float = 0.0  # seconds spent waiting for a free connection
+
+    def as_dict(self) -> dict[str, int | float]:
+        """Return the counters, rounding the wait time for display."""
+        return {
+            "pool_hits": self.pool_hits,
+            "new_connections": self.new_connections,
+            "queued": self.queued,
+            "wait_time": round(self.wait_time, 3),
+        }
+
+
+def _create_trace_config(stats: ConnectionPoolStats) -> aiohttp.TraceConfig:
+    """Create a trace config updating stats on connection pool events."""
+    trace_config = aiohttp.TraceConfig()
+
+    async def on_connection_reuseconn(
+        session: aiohttp.ClientSession, context: SimpleNamespace, params
+    ) -> None:
+        stats.pool_hits += 1
+
+    async def on_connection_create_end(
+        session: aiohttp.ClientSession, context: SimpleNamespace, params
+    ) -> None:
+        stats.new_connections += 1
+
+    async def on_connection_queued_start(
+        session: aiohttp.ClientSession, context: SimpleNamespace, params
+    ) -> None:
+        context.queued_at = time.monotonic()
+
+    async def on_connection_queued_end(
+        session: aiohttp.ClientSession, context: SimpleNamespace, params
+    ) -> None:
+        stats.queued += 1
+        stats.wait_time += time.monotonic() - context.queued_at
+
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_queued_start.append(on_connection_queued_start)
+    trace_config.on_connection_queued_end.append(on_connection_queued_end)
+    return trace_config
+
+
+def create_supervisor_session(
+    hass: HomeAssistant, stats: ConnectionPoolStats
+) -> aiohttp.ClientSession:
+    """Create a pooled session for the supervisor, see async_close_session_on_unload."""
+    connector = aiohttp.TCPConnector(
+        limit=_CONNECTION_LIMIT,
+        keepalive_timeout=_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=_DNS_CACHE_TTL,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers={"User-Agent": f"{APPLICATION_NAME}/{__version__} balena_docker"},
+        trace_configs=[_create_trace_config(stats)],
+    )
+
+
+@callback
+def async_close_session_on_unload(
+    hass: HomeAssistant, config_entry: ConfigEntry, session: aiohttp.ClientSession
+) -> None:
+    """Close a dedicated session when its config entry is unloaded, or fails to set up.
+
+    Config entries are not unloaded when Home Assistant stops, so the session is
+    also closed on EVENT_HOMEASSISTANT_CLOSE, like the shared sessions of Home Assistant.
+    """
+
+    async def _async_close(_event: Event | None = None) -> None:
+        await session.close()
+
+    config_entry.async_on_unload(_async_close)
+    config_entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close)
+    )
@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
+from collections.abc import Callable
 from dataclasses import dataclass, field
-from typing import TYPE_CHECKING, TypedDict
+from fnmatch import fnmatchcase
+from typing import TYPE_CHECKING, Any, NotRequired, TypedDict
 
 import voluptuous as vol
 
@@ -11,33 +13,156 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import callback
 from homeassistant.helpers.entity import Entity
 
+from .fleet import FleetScheduler
+
 if TYPE_CHECKING:
     from .coordinator import BalenaSupervisorApiClient, BalenaSupervisorStateCoordinator
+    from .logs import BalenaLogStream
+    from .push import BalenaEventBridge
+    from .resources import BalenaResourceCoordinator
 
 
-class BalenaServiceState(TypedDict):
-    """State of a service/container in Balena application."""
+class InvalidSupervisorState(ValueError):
+    """A /v2/applications/state payload that does not have the documented shape."""
 
-    status: str
-    releaseId: int
-    downloadProgress: str
+
+@dataclass(slots=True, frozen=True)
+class BalenaService:
+    """State of a service/container in a Balena application, decoded once per refresh."""
+
+    status: str  # lower case, e.g. "running", "exited", "downloading"
+    release_id: int | None
+    download_progress: float | None  # percent, None when not downloading
+
+    @classmethod
+    def from_response(cls, content: Any, where: str) -> BalenaService:
+        """Validate and decode a service of a /v2/applications/state response."""
+        if not isinstance(content, dict):
+            raise InvalidSupervisorState(f"{where} must be an object")
+        status = content.get("status")
+        if not isinstance(status, str):
+            raise InvalidSupervisorState(f"{where}: status must be a string")
+        release_id = content.get("releaseId")
+        if release_id is not None and not isinstance(release_id, int):
+            raise InvalidSupervisorState(f"{where}: releaseId must be an integer")
+        download_progress = content.get("downloadProgress")
+        if download_progress is not None:
+            try:
+                download_progress = float(download_progress)
+            except (TypeError, ValueError):
+                raise InvalidSupervisorState(
+                    f"{where}: downloadProgress must be a number"
+                ) from None
+        return cls(status.lower(), release_id, download_progress)
+
+    def as_response(self) -> dict[str, Any]:
+        """Return the service in the shape of a /v2/applications/state response."""
+        return {
+            "status": self.status,
+            "releaseId": self.release_id,
+            "downloadProgress": self.download_progress,
+        }
 
 
-class BalenaAppState(TypedDict):
-    """State of a Balena application."""
+@dataclass(slots=True, frozen=True)
+class BalenaApp:
+    """A Balena application, its services are in BalenaSupervisorState.services."""
 
-    appId: int
-    appName: str
+    app_id: int
+    app_name: str
+    commit: str | None
+    service_names: tuple[str, ...]
+
+
+class BalenaDeviceInfo(TypedDict, total=False):
+    """Device details from the /v1/device endpoint."""
+
+    api_port: int
+    ip_address: str  # space separated
     commit: str
-    services: dict[str, BalenaServiceState]
+    status: str
+    download_progress: int | None
+    os_version: str
+    supervisor_version: str
+    update_pending: bool
+    update_downloaded: bool
+    update_failed: bool
+
+
+class BalenaStateStatus(TypedDict, total=False):
+    """Update status from the /v2/state/status endpoint."""
+
+    status: str
+    appState: str  # "applied" or "applying"
+    overallDownloadProgress: int | None
+    release: str
+
+
+type ServiceKey = tuple[int, str]  # (appId, service name)
+
+
+@dataclass(slots=True)
+class BalenaSupervisorState:
+    """State of all Balena applications on a device, indexed for O(1) lookups."""
+
+    apps: dict[int, BalenaApp] = field(default_factory=dict)  # key is appId
+    services: dict[ServiceKey, BalenaService] = field(default_factory=dict)
+
+    @classmethod
+    def from_response(cls, resp_json: Any) -> BalenaSupervisorState:
+        """Validate and index a /v2/applications/state response, keyed by app name.
+
+        Raise InvalidSupervisorState naming the first malformed field.
+        """
+        if not isinstance(resp_json, dict):
+            raise InvalidSupervisorState("state must be an object of applications")
+        state = cls()
+        for app_name, content in resp_json.items():
+            where = f"app {app_name!r}"
+            if not isinstance(content, dict):
+                raise InvalidSupervisorState(f"{where} must be an object")
+            app_id = content.get("appId")
+            if not isinstance(app_id, int):
+                raise InvalidSupervisorState(f"{where}: appId must be an integer")
+            services = content.get("services")
+            if not isinstance(services, dict):
+                raise InvalidSupervisorState(f"{where}: services must be an object")
+            commit = content.get("commit")
+            state.apps[app_id] = BalenaApp(
+                app_id=app_id,
+                app_name=app_name,
+                commit=commit if isinstance(commit, str) else None,
+                service_names=tuple(services),
+            )
+            for service_name, service in services.items():
+                state.services[(app_id, service_name)] = BalenaService.from_response(
+                    service, f"{where}, service {service_name!r}"
+                )
+        return state
+
+    def as_response(self) -> dict[str, Any]:
+        """Return the state in the shape of a /v2/applications/state response."""
+        return {
+            app.app_name: {
+                "appId": app.app_id,
+                "commit": app.commit,
+                "services": {
+                    service_name: self.services[(app.app_id, service_name)].as_response()
+                    for service_name in app.service_names
+                },
+            }
+            for app in self.apps.values()
+        }
 
 
 class ConfigEntryData(TypedDict):
     """Data to be stored in the ConfigEntry.data."""
 
-    connection_type: str  # "same_device_no_proxy" only for now
+    connection_type: str  # "same_device_no_proxy" or "remote"
     disable_self_control: bool
     auto_load_js_modules: bool
+    url: NotRequired[str]  # supervisor address, "remote" only
+    api_key: NotRequired[str]  # supervisor API key, "remote" only
 
 
 @callback
@@ -48,7 +173,13 @@ def create_config_entry_data_schema(default_data: ConfigEntryData | dict) -> vol
             vol.Required(
                 "connection_type",
                 default=default_data.get("connection_type", "same_device_no_proxy"),
-            ): vol.In(["same_device_no_proxy"]),
+            ): vol.In(["same_device_no_proxy", "remote"]),
+            vol.Optional(
+                "url", description={"suggested_value": default_data.get("url")}
+            ): str,
+            vol.Optional(
+                "api_key", description={"suggested_value": default_data.get("api_key")}
+            ): str,
             vol.Required(
                 "disable_self_control",
                 default=default_data.get("disable_self_control", True),
@@ -61,6 +192,69 @@ def create_config_entry_data_schema(default_data: ConfigEntryData | dict) -> vol
     )
 
 
+class ConfigEntryOptions(TypedDict):
+    """Options to be stored in the ConfigEntry.options."""
+
+    update_interval: float  # seconds between refreshes while services are steady
+    request_timeout: float  # seconds
+    max_retries: int  # retries for idempotent GET requests
+    circuit_breaker_threshold: int  # consecutive failures before failing fast
+    circuit_breaker_reset: float  # seconds before probing the API again
+    resource_update_interval: float  # seconds between container metrics refreshes
+    collect_metrics: bool  # API latency and error metrics, for diagnostics and sensors
+    crash_loop_threshold: int  # restarts within 10 minutes making a crash loop
+
+
+DEFAULT_CONFIG_ENTRY_OPTIONS = ConfigEntryOptions(
+    update_interval=300,
+    request_timeout=10,
+    max_retries=2,
+    circuit_breaker_threshold=5,
+    circuit_breaker_reset=60,
+    resource_update_interval=60,
+    collect_metrics=False,
+    crash_loop_threshold=3,
+)
+
+
+@callback
+def create_config_entry_options_schema(
+    default_options: ConfigEntryOptions | dict,
+) -> vol.Schema:
+    """Create the schema for the options flow."""
+    defaults = {**DEFAULT_CONFIG_ENTRY_OPTIONS, **default_options}
+    return vol.Schema(
+        {
+            vol.Required(
+                "update_interval", default=defaults["update_interval"]
+            ): vol.All(vol.Coerce(float), vol.Range(min=30, max=3600)),
+            vol.Required(
+                "request_timeout", default=defaults["request_timeout"]
+            ): vol.All(vol.Coerce(float), vol.Range(min=1, max=120)),
+            vol.Required("max_retries", default=defaults["max_retries"]): vol.All(
+                vol.Coerce(int), vol.Range(min=0, max=10)
+            ),
+            vol.Required(
+                "circuit_breaker_threshold",
+                default=defaults["circuit_breaker_threshold"],
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+            vol.Required(
+                "circuit_breaker_reset", default=defaults["circuit_breaker_reset"]
+            ): vol.All(vol.Coerce(float), vol.Range(min=5, max=3600)),
+            vol.Required(
+                "resource_update_interval",
+                default=defaults["resource_update_interval"],
+            ): vol.All(vol.Coerce(float), vol.Range(min=10, max=3600)),
+            vol.Required(
+                "collect_metrics", default=defaults["collect_metrics"]
+            ): bool,
+            vol.Required(
+                "crash_loop_threshold", default=defaults["crash_loop_threshold"]
+            ): vol.All(vol.Coerce(int), vol.Range(min=2, max=20)),
+        }
+    )
+
+
 @dataclass
 class ConfigEntryRuntimeData:
     """Non-persistent runtime data to be stored in ConfigEntry.runtime_data."""
@@ -68,6 +262,13 @@ class ConfigEntryRuntimeData:
     state_coordinator: BalenaSupervisorStateCoordinator
     api_client: BalenaSupervisorApiClient
     js_modules: list[str] = field(default_factory=list)
+    # only when the balena engine socket is mounted in the Home Assistant container
+    resource_coordinator: BalenaResourceCoordinator | None = None
+    setup_mode: str = "cold"  # "warm" when entities were created from the snapshot
+    setup_duration: float = 0.0  # seconds
+    log_stream: BalenaLogStream | None = None
+    # with the resource coordinator, pushes container statuses from the engine events
+    event_bridge: BalenaEventBridge | None = None
 
 
 type BalenaDockerConfigEntry = ConfigEntry[ConfigEntryRuntimeData]
@@ -79,16 +280,56 @@ class HassData:
 
     config_entries: dict[str, BalenaDockerConfigEntry] = field(default_factory=dict)
     entities: dict[str, Entity] = field(default_factory=dict)  # key is entity_id
+    fleet_scheduler: FleetScheduler = field(default_factory=FleetScheduler)
+    fleet_summary_entry_id: str | None = None  # config entry owning the fleet sensor
+    # add entities callback of the remote config entries, to hand the fleet sensor over
+    fleet_summary_adders: dict[str, Callable[[list[Entity]], None]] = field(
+        default_factory=dict
+    )
+    # JS modules shared by all config entries, see frontend.load_js_modules
+    js_static_path_registered: bool = False
+    js_modules: list[str] = field(default_factory=list)
+    js_module_entries: set[str] = field(default_factory=set)
 
     def add_entities(self, new_entities: list[Entity]) -> None:
         """Add entities to the internal dict."""
         for entity in new_entities:
             self.entities[entity.entity_id] = entity
 
+    def remove_entity(self, entity: Entity) -> None:
+        """Remove an entity from the internal dict, unless replaced by another one."""
+        if self.entities.get(entity.entity_id) is entity:
+            del self.entities[entity.entity_id]
+
     def add_config_entry(self, config_entry: ConfigEntry) -> None:
         """Add a config entry to the internal dict."""
         self.config_entries[config_entry.entry_id] = config_entry
 
+    def remove_config_entry(self, config_entry: ConfigEntry) -> None:
+        """Remove a config entry and its entities from the internal dicts."""
+        self.config_entries.pop(config_entry.entry_id, None)
+        self.entities = {
+            entity_id: entity
+            for entity_id, entity in self.entities.items()
+            if entity.coordinator.config_entry is not config_entry
+        }
+        self.fleet_summary_adders.pop(config_entry.entry_id, None)
+        if self.fleet_summary_entry_id == config_entry.entry_id:
+            self.fleet_summary_entry_id = None
+
     def get_entity(self, entity_id: str) -> Entity | None:
         """Get an entity by its entity_id."""
         return self.entities.get(entity_id)
+
+    def is_container(self, entity_id: str) -> bool:
+        """Return True if entity_id is a container entity, not a device entity."""
+        return getattr(self.entities.get(entity_id), "service_name", None) is not None
+
+    def match_entities(self, pattern: str) -> list[str]:
+        """Return the container entity_ids whose entity_id or service name match a glob pattern."""
+        return [
+            entity_id
+            for entity_id, entity in self.entities.items()
+            if (service_name := getattr(entity, "service_name", None)) is not None
+            and (fnmatchcase(entity_id, pattern) or fnmatchcase(service_name, pattern))
+        ]
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""Benchmark the supervisor client and the coordinator update path, offline.
+
+Starts the mock supervisor in a child process for each service count, then
+measures against it:
+  - get_state latency, through BalenaSupervisorApiClient and aiohttp
+  - JSON parse cost of the /v2/applications/state payload, decode and validation
+  - refresh to state write time, with one listener per service writing a state
+    like BalenaContainerEntity.async_write_ha_state, for an idle refresh (no
+    service changed) and a full fan-out (every service changed)
+  - the longest event loop block while refreshing
+
+Must run in the Home Assistant development environment. Results are written
+as JSON, to compare between versions:
+
+    python script/benchmark.py --services 1 10 100 500 --latency 0.005 --output bench.json
+"""
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from types import MappingProxyType
+from typing import Any
+
+import aiohttp
+import uvicorn
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+
+from homeassistant.config_entries import ConfigEntry  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.util.json import json_loads  # noqa: E402
+
+from custom_components.balena_docker.const import DOMAIN  # noqa: E402
+from custom_components.balena_docker.coordinator import (  # noqa: E402
+    BalenaSupervisorApiClient,
+    BalenaSupervisorStateCoordinator,
+)
+from custom_components.balena_docker.fleet import FleetScheduler  # noqa: E402
+from custom_components.balena_docker.types import BalenaSupervisorState  # noqa: E402
+from mock_balena_supervisor import Scenario, create_app, generate_state  # noqa: E402
+
+API_KEY = "benchmark"
+LOOP_PROBE_INTERVAL = 0.001  # seconds
+
+
+def serve_mock(port: int, services: int, latency: float, jitter: float) -> None:
+    """Serve the mock supervisor, run in a child process to not share the event loop."""
+    scenario = Scenario(latency=latency, jitter=jitter, log_sample_rate=0)
+    uvicorn.run(
+        create_app(generate_state(services), scenario=scenario),
+        host="127.0.0.1",
+        port=port,
+        log_level="warning",
+    )
+
+
+def free_port() -> int:
+    """Return a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_mock(url: str, timeout: float = 10) -> None:
+    """Wait until the mock answers."""
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.get(f"{url}/v2/version") as resp:
+                    if resp.status == 200:
+                        return
+            except aiohttp.ClientError:
+                if time.monotonic() > deadline:
+                    raise
+            await asyncio.sleep(0.1)
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """Return the distribution of samples, in milliseconds."""
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+    }
+
+
+class LoopBlockProbe:
+    """Measure how late a short sleep wakes up, the longest time the loop was blocked."""
+
+    def __init__(self) -> None:
+        """Initialize the probe, not running."""
+        self.max_block = 0.0
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LOOP_PROBE_INTERVAL)
+            self.max_block = max(
+                self.max_block, time.perf_counter() - start - LOOP_PROBE_INTERVAL
+            )
+
+    def __enter__(self) -> "LoopBlockProbe":
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._task.cancel()
+
+
+async def time_async(
+    func: Callable[[], Awaitable[Any]], iterations: int
+) -> tuple[list[float], float]:
+    """Return the duration of each call, and the longest loop block during all of them."""
+    samples = []
+    with LoopBlockProbe() as probe:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await func()
+            samples.append(time.perf_counter() - start)
+            # let the probe run between calls
+            await asyncio.sleep(LOOP_PROBE_INTERVAL * 2)
+    return samples, probe.max_block
+
+
+def time_sync(func: Callable[[], Any], iterations: int) -> list[float]:
+    """Return the duration of each call."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def create_config_entry(url: str) -> ConfigEntry:
+    """Return a config entry for the mock, with polling disabled to refresh on demand."""
+    return ConfigEntry(
+        domain=DOMAIN,
+        title="benchmark",
+        data={
+            "connection_type": "remote",
+            "url": url,
+            "api_key": API_KEY,
+            "disable_self_control": False,
+            "auto_load_js_modules": False,
+        },
+        options={},
+        source="user",
+        version=1,
+        minor_version=1,
+        unique_id=url,
+        discovery_keys=MappingProxyType({}),
+        subentries_data=None,
+        pref_disable_polling=True,
+    )
+
+
+async def benchmark_services(
+    hass: HomeAssistant, url: str, services: int, iterations: int
+) -> dict[str, Any]:
+    """Run all measurements against a mock serving services services."""
+    async with aiohttp.ClientSession() as session:
+        client = BalenaSupervisorApiClient(session, url=url, api_key=API_KEY)
+
+        get_state, get_state_block = await time_async(client.get_state, iterations)
+
+        payload = await client._request("GET", "/v2/applications/state")
+        decoded = json_loads(payload)
+        parse = {
+            "payload_bytes": len(payload),
+            "json_loads": summarize(time_sync(lambda: json_loads(payload), iterations * 10)),
+            "from_response": summarize(
+                time_sync(
+                    lambda: BalenaSupervisorState.from_response(decoded), iterations * 10
+                )
+            ),
+        }
+
+        coordinator = BalenaSupervisorStateCoordinator(
+            hass,
+            create_config_entry(url),
+            client,
+            scheduler=FleetScheduler(min_spacing=0),
+        )
+        await coordinator.async_refresh()
+
+        # one listener per service, writing a state like BalenaContainerEntity
+        written = 0
+
+        def make_listener(key: tuple[int, str]) -> Callable[[], None]:
+            entity_id = f"sensor.benchmark_{key[0]}_{key[1]}"
+
+            def write_state() -> None:
+                nonlocal written
+                service = coordinator.data.services.get(key)
+                hass.states.async_set(entity_id, service.status if service else None)
+                written += 1
+
+            return write_state
+
+        unsubscribes = [
+            coordinator.async_add_listener(make_listener(key), key)
+            for key in coordinator.data.services
+        ]
+
+        refresh_idle, refresh_idle_block = await time_async(
+            coordinator.async_refresh, iterations
+        )
+        written = 0
+
+        async def refresh_all_changed() -> None:
+            # every service is seen as added, so every listener is written
+            coordinator.data = BalenaSupervisorState({}, {})
+            await coordinator.async_refresh()
+
+        refresh_fanout, refresh_fanout_block = await time_async(
+            refresh_all_changed, iterations
+        )
+        fanout_writes = written
+
+        for unsubscribe in unsubscribes:
+            unsubscribe()
+        await coordinator.async_shutdown()
+
+    return {
+        "services": services,
+        "get_state": summarize(get_state),
+        "parse": parse,
+        "refresh_idle": summarize(refresh_idle),
+        "refresh_fanout": {
+            **summarize(refresh_fanout),
+            "state_writes_per_refresh": fanout_writes / iterations,
+        },
+        "loop_block_max_ms": {
+            "get_state": round(get_state_block * 1000, 4),
+            "refresh_idle": round(refresh_idle_block * 1000, 4),
+            "refresh_fanout": round(refresh_fanout_block * 1000, 4),
+        },
+    }
+
+
+def git_revision() -> str | None:
+    """Return the commit being benchmarked."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=SCRIPT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    """Benchmark every service count, each against its own mock."""
+    results = []
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        for services in args.services:
+            port = free_port()
+            mock = multiprocessing.Process(
+                target=serve_mock,
+                args=(port, services, args.latency, args.jitter),
+                daemon=True,
+            )
+            mock.start()
+            try:
+                url = f"http://127.0.0.1:{port}"
+                await wait_for_mock(url)
+                results.append(
+                    await benchmark_services(hass, url, services, args.iterations)
+                )
+            finally:
+                mock.terminate()
+                mock.join()
+            print(json.dumps(results[-1]), file=sys.stderr)
+        await hass.async_stop(force=True)
+
+    return {
+        "revision": git_revision(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "services": args.services,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "iterations": args.iterations,
+        },
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--services",
+        type=int,
+        nargs="+",
+        default=[1, 10, 50, 100, 500],
+        help="service counts to benchmark, 1 to 500",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds added to every mock response"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="up to this many seconds added on top"
+    )
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--output", default="-", help="JSON results file, - for stdout")
+    args = parser.parse_args()
+    if not all(1 <= services <= 500 for services in args.services):
+        parser.error("--services must be between 1 and 500")
+
+    report = json.dumps(asyncio.run(run(args)), indent=2)
+    if args.output == "-":
+        print(report)
+    else:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(report + "\n")
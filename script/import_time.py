@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Measure the import time of the integration, on top of what Home Assistant already loaded.
+
+Each run is a fresh interpreter started with -X importtime. Modules loaded by
+the baseline, what Home Assistant imports before any integration, are left
+out, so only the modules the integration adds are counted:
+
+    python script/import_time.py --runs 5 --top 15
+
+Must run in the Home Assistant development environment.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "custom_components.balena_docker"
+
+# loaded by Home Assistant core and the default integrations before ours
+BASELINE = [
+    "aiohttp",
+    "voluptuous",
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.update_coordinator",
+    "homeassistant.helpers.entity_platform",
+    "homeassistant.components.websocket_api",
+    "homeassistant.components.sensor",
+]
+
+
+def loaded_by(baseline: list[str]) -> set[str]:
+    """Return the modules imported by the baseline alone."""
+    code = "\n".join(["import sys", *(f"import {module}" for module in baseline)])
+    result = subprocess.run(
+        [sys.executable, "-c", code + "\nprint('\\n'.join(sys.modules))"],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(result.stdout.split())
+
+
+def measure(modules: list[str], skipped: set[str]) -> dict[str, tuple[int, int]]:
+    """Return the self and cumulative import time of each module not skipped, in microseconds."""
+    code = "\n".join(f"import {module}" for module in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: dict[str, tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[12:].split("|"))
+        # the module name keeps its nesting indentation
+        if self_us.isdigit() and name.strip() not in skipped:
+            times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--modules",
+        nargs="+",
+        default=[PACKAGE, f"{PACKAGE}.sensor", f"{PACKAGE}.config_flow"],
+        help="modules imported by Home Assistant to set up the integration",
+    )
+    parser.add_argument("--no-baseline", action="store_true", help="count every module")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    args = parser.parse_args()
+
+    baseline = [] if args.no_baseline else BASELINE
+    skipped = loaded_by(baseline) if baseline else set()
+    runs = [measure(args.modules, skipped) for _ in range(args.runs)]
+    totals = [sum(self_us for self_us, _ in run.values()) for run in runs]
+    # median self time of each module over the runs
+    names = set().union(*runs)
+    self_times = {
+        name: statistics.median(run[name][0] for run in runs if name in run)
+        for name in names
+    }
+    slowest = sorted(self_times.items(), key=lambda item: item[1], reverse=True)
+    print(
+        json.dumps(
+            {
+                "modules": args.modules,
+                "baseline": baseline,
+                "new_modules": len(names),
+                "total_ms": round(statistics.median(totals) / 1000, 2),
+                "integration_ms": round(
+                    sum(us for name, us in self_times.items() if name.startswith(PACKAGE))
+                    / 1000,
+                    2,
+                ),
+                "slowest_ms": {
+                    name: round(us / 1000, 2) for name, us in slowest[: args.top]
+                },
+            },
+            indent=2,
+        )
+    )
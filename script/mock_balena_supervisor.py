@@ -3,27 +3,55 @@
 
 This module provides a FastAPI app that simulates the Balena Supervisor endpoints
 for application state and container service control (start, stop, restart).
+It also stands in for the balena engine /events stream: point Home Assistant at
+it with DOCKER_HOST=tcp://localhost:8080 to get pushed status changes, and
+POST /mock/crash/{appid}/{service} to make a service exit on its own.
+When BALENA_SUPERVISOR_API_KEY is set, requests with another apikey are
+rejected with 401, like the supervisor does.
+
+For load tests, a scenario (--scenario FILE, JSON) generates N apps x M services
+and injects latency, errors and slow streaming, globally or per endpoint:
+
+    {
+        "apps": 2, "services": 50,
+        "latency": 0.01, "jitter": 0.005,
+        "error_rate": 0.01, "error_status": 503,
+        "log_sample_rate": 0.01,
+        "instances": 20,
+        "endpoints": {
+            "/v2/applications/state": {"chunk_size": 512, "chunk_delay": 0.05}
+        }
+    }
+
+Endpoint keys are glob patterns of the path. With "instances" (or --instances N)
+above 1, N independent supervisors are served on consecutive ports from one
+process, to test one Home Assistant polling a fleet of devices.
 """
 
+import argparse
+import copy
+import dataclasses
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
 import os
 import logging
-from fastapi import FastAPI, HTTPException, Request, Response
+from collections import Counter
+from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel
 import uvicorn
-from starlette.background import BackgroundTask
 from typing import Any, Dict
 import asyncio
 import random
-from fastapi.responses import JSONResponse
-
-app = FastAPI()
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+import json
+import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("mock_balena")
 
 # Simple in-memory container state
 appName = "tst"
-state = {
+DEFAULT_STATE = {
     appName: {
         "appId": 123,
         "commit": "fdsghjklerwthyjuk",
@@ -48,40 +76,166 @@ state = {
 }
 
 
-def log_info(url, req_body, res_body):
-    logger.info(
-        "request \n\t URL: %s, \n\t request: %s \n\t response: %s \n\t state: %s",
-        url,
-        req_body,
-        res_body,
-        state,
-    )
+def generate_state(services: int, apps: int = 1) -> dict[str, Any]:
+    """Return a state of apps apps sharing services running services, for load tests."""
+    state = {}
+    for app_index in range(apps):
+        count = services // apps + (app_index < services % apps)
+        state[f"app{app_index}"] = {
+            "appId": 1000 + app_index,
+            "commit": f"commit{app_index}",
+            "services": {
+                f"service{service_index}": {
+                    "status": "Running",
+                    "releaseId": 345,
+                    "downloadProgress": None,
+                }
+                for service_index in range(count)
+            },
+        }
+    return state
 
 
-@app.middleware("http")
-async def some_middleware(request: Request, call_next):
-    req_body = await request.body()
-    # await set_body(request, req_body)  # not needed when using FastAPI>=0.108.0.
-    response = await call_next(request)
-
-    chunks = []
-    async for chunk in response.body_iterator:
-        chunks.append(chunk)
-    res_body = b"".join(chunks)
-
-    task = BackgroundTask(log_info, request.url, req_body, res_body)
-    return Response(
-        content=res_body,
-        status_code=response.status_code,
-        headers=dict(response.headers),
-        media_type=response.media_type,
-        background=task,
-    )
+@dataclass(frozen=True)
+class EndpointBehaviour:
+    """Faults injected into the responses of an endpoint."""
+
+    latency: float = 0.0  # seconds before responding
+    jitter: float = 0.0  # up to this many seconds added to latency
+    error_rate: float = 0.0  # probability of answering error_status instead
+    error_status: int = 503
+    chunk_size: int = 0  # slow streaming: send the body in chunks of this size
+    chunk_delay: float = 0.0  # seconds between chunks
+
+
+@dataclass(frozen=True)
+class Scenario(EndpointBehaviour):
+    """State and behaviour of the mock supervisors, see the module docstring."""
 
+    apps: int = 0  # generate apps x services when both are set, else use state
+    services: int = 0
+    state: dict[str, Any] | None = None
+    instances: int = 1
+    log_sample_rate: float = 1.0  # fraction of requests logged
+    endpoints: dict[str, dict[str, Any]] = field(default_factory=dict)
 
-@app.post("/")
-def main(payload: Dict[Any, Any]):
-    return payload
+    @classmethod
+    def from_file(cls, path: str) -> "Scenario":
+        """Load a scenario from a JSON file."""
+        with open(path, encoding="utf-8") as file:
+            return cls(**json.load(file))
+
+    def build_state(self) -> dict[str, Any]:
+        """Return a new state for one supervisor."""
+        if self.apps and self.services:
+            return generate_state(self.apps * self.services, self.apps)
+        return copy.deepcopy(DEFAULT_STATE if self.state is None else self.state)
+
+    def behaviour(self, path: str) -> EndpointBehaviour:
+        """Return the behaviour of a path, the first matching endpoint overriding the defaults."""
+        if path.startswith("/mock/"):
+            # the mock's own endpoints are never faulty
+            return EndpointBehaviour()
+        defaults = {
+            f.name: getattr(self, f.name) for f in dataclasses.fields(EndpointBehaviour)
+        }
+        for pattern, overrides in self.endpoints.items():
+            if fnmatchcase(path, pattern):
+                return EndpointBehaviour(**{**defaults, **overrides})
+        return EndpointBehaviour(**defaults)
+
+
+class ScenarioMiddleware:
+    """ASGI middleware injecting the faults of a scenario and logging sampled requests.
+
+    Response bodies are passed through, never buffered, so followed streams work
+    and the middleware stays cheap under load.
+    """
+
+    def __init__(
+        self,
+        app,
+        scenario: Scenario,
+        name: str,
+        requests: Counter[str],
+        errors: Counter[str],
+    ) -> None:
+        self.app = app
+        self.scenario = scenario
+        self.name = name
+        self.requests = requests
+        self.errors = errors
+        self._behaviours: dict[str, EndpointBehaviour] = {}
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if (behaviour := self._behaviours.get(path)) is None:
+            behaviour = self._behaviours[path] = self.scenario.behaviour(path)
+        start = time.perf_counter()
+        self.requests[path] += 1
+
+        if behaviour.latency or behaviour.jitter:
+            await asyncio.sleep(behaviour.latency + random.uniform(0, behaviour.jitter))
+
+        if behaviour.error_rate and random.random() < behaviour.error_rate:
+            self.errors[path] += 1
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": behaviour.error_status,
+                    "headers": [(b"content-type", b"application/json")],
+                }
+            )
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": b'{"status":"failed","message":"injected error"}',
+                }
+            )
+            self._log(scope, behaviour.error_status, start)
+            return
+
+        status = 0
+
+        async def send_slowly(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body" and behaviour.chunk_size:
+                body = message.get("body", b"")
+                for i in range(0, len(body), behaviour.chunk_size):
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": body[i : i + behaviour.chunk_size],
+                            "more_body": True,
+                        }
+                    )
+                    await asyncio.sleep(behaviour.chunk_delay)
+                message = {
+                    "type": "http.response.body",
+                    "body": b"",
+                    "more_body": message.get("more_body", False),
+                }
+            await send(message)
+
+        await self.app(scope, receive, send_slowly)
+        self._log(scope, status, start)
+
+    def _log(self, scope, status: int, start: float) -> None:
+        if random.random() < self.scenario.log_sample_rate:
+            logger.info(
+                "[%s] %s %s -> %d in %.1fms",
+                self.name,
+                scope["method"],
+                scope["path"],
+                status,
+                (time.perf_counter() - start) * 1000,
+            )
 
 
 class ContainerControlRequestBody(BaseModel):
@@ -90,91 +244,399 @@ class ContainerControlRequestBody(BaseModel):
     serviceName: str  # noqa: N815
 
 
-@app.get("/v2/applications/state")
-async def get_applications_state():
-    """Mocking the /v2/applications/state endpoint of Balena Supervisor."""
-    return state
+class ApplicationControlRequestBody(BaseModel):
+    """Optional request body for restart/purge a whole application."""
+
+    force: bool = False
+
+
+class JournalLogsRequestBody(BaseModel):
+    """Request body for the /v2/journal-logs endpoint."""
+
+    follow: bool = False
+    count: int | None = None
+    format: str = "short"
+
+
+class V1RestartRequestBody(BaseModel):
+    """Request body for the legacy /v1/restart endpoint."""
 
+    appId: int  # noqa: N815
 
-async def transition_service_state(
-    service_name: str, state_sequence: list[str], delays: list[float]
-):
-    """Transition a service through a sequence of states with delays."""
-    appstate = state[appName]
-    for i, next_state in enumerate(state_sequence):
-        if i > 0:  # Skip delay before first state change
-            await asyncio.sleep(delays[i - 1])
-        appstate["services"][service_name]["status"] = next_state
-        logger.info(f"Service {service_name} transitioned to {next_state}")
-
-
-@app.post("/v2/applications/{appid}/{action}")
-async def control_application(
-    appid: int, action: str, body: ContainerControlRequestBody
-):
-    """Mocking the /v2/applications/{appid}/start-service, stop-service, restart-service endpoint of Balena Supervisor."""
-    if appid != state[appName]["appId"]:
+
+def create_app(
+    state: dict[str, Any] | None = None,
+    name: str = "mock",
+    scenario: Scenario | None = None,
+    api_key: str | None = None,
+) -> FastAPI:
+    """Create a mock supervisor app, owning a copy of state (or of the scenario state).
+
+    Requests must carry api_key as apikey when it is given, except /ping, the
+    engine /events and the /mock/ endpoints.
+    """
+    app = FastAPI()
+    scenario = scenario or Scenario()
+    state = copy.deepcopy(state) if state is not None else scenario.build_state()
+    app.state.supervisor_state = state
+
+    def find_app(appid: int) -> dict[str, Any]:
+        for appstate in state.values():
+            if appstate["appId"] == appid:
+                return appstate
         raise HTTPException(status_code=404, detail="App not found")
 
-    if action not in ["start-service", "stop-service", "restart-service"]:
-        raise HTTPException(status_code=400, detail="Invalid action")
+    requests: Counter[str] = Counter()
+    errors: Counter[str] = Counter()
+    app.add_middleware(
+        ScenarioMiddleware, scenario=scenario, name=name, requests=requests, errors=errors
+    )
 
-    service_name = body.serviceName
-    if service_name not in state[appName]["services"]:
-        raise HTTPException(status_code=404, detail="Service not found")
+    if api_key is not None:
 
-    current_status = state[appName]["services"][service_name]["status"]
+        @app.middleware("http")
+        async def check_api_key(request: Request, call_next):
+            path = request.url.path
+            if (
+                path not in ("/ping", "/events")
+                and not path.startswith("/mock/")
+                and request.query_params.get("apikey") != api_key
+            ):
+                return JSONResponse(content="Unauthorized", status_code=401)
+            return await call_next(request)
 
-    if action == "start-service":
-        if current_status in ["Exited"]:
-            # Start a background task to transition: Exited/Stopped -> Installing -> Running
-            delays = [
-                random.uniform(0.5, 2.0)
-            ]  # Random delay between Installing and Running
-            asyncio.create_task(
-                transition_service_state(
-                    service_name, ["Installing", "Running"], delays
-                )
-            )
-            return JSONResponse(content="OK", status_code=200)
-        else:
-            return JSONResponse(
-                content="Service already running or in transition", status_code=200
-            )
+    @app.get("/ping")
+    async def ping():
+        """Mocking the /ping endpoint of Balena Supervisor."""
+        return PlainTextResponse("OK")
 
-    elif action == "stop-service":
-        if current_status == "Running":
-            # Start a background task to transition: Running -> Stopping -> Exited -> Stopped
-            delays = [random.uniform(0.5, 1.5), random.uniform(0.5, 1.0)]
-            asyncio.create_task(
-                transition_service_state(service_name, ["Stopping", "Exited"], delays)
-            )
-            return JSONResponse(content="OK", status_code=200)
-        else:
-            return JSONResponse(
-                content="Service not running or already in transition", status_code=200
+    @app.get("/mock/stats")
+    async def get_stats():
+        """Return the requests served and the errors injected, per path."""
+        return {"requests": requests, "errors": errors}
+
+    # stand-in for the balena engine /events stream, see BalenaEventBridge
+    event_queues: set[asyncio.Queue] = set()
+    event_actions = {
+        "Installing": "create",
+        "Running": "start",
+        "Stopping": "kill",
+        "Exited": "die",
+    }
+
+    def emit_event(appstate: dict[str, Any], service_name: str, status: str) -> None:
+        """Send a docker style container event to every /events follower."""
+        if (action := event_actions.get(status)) is None or not event_queues:
+            return
+        now = time.time_ns()
+        event = {
+            "Type": "container",
+            "Action": action,
+            "status": action,
+            "Actor": {
+                "ID": f"{appstate['appId']}{service_name}",
+                "Attributes": {
+                    "io.balena.app-id": str(appstate["appId"]),
+                    "io.balena.service-name": service_name,
+                },
+            },
+            "time": now // 1_000_000_000,
+            "timeNano": now,
+        }
+        for queue in event_queues:
+            if queue.full():
+                # a slow follower loses its oldest events, like a lagging engine client
+                queue.get_nowait()
+            queue.put_nowait(json.dumps(event).encode() + b"\n")
+
+    @app.get("/events")
+    async def get_events():
+        """Mocking the /events endpoint of the balena engine, reached with DOCKER_HOST=tcp://."""
+        queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=100)
+
+        async def events():
+            event_queues.add(queue)
+            try:
+                while True:
+                    yield await queue.get()
+            finally:
+                event_queues.discard(queue)
+
+        return StreamingResponse(events(), media_type="application/json")
+
+    @app.post("/mock/crash/{appid}/{service_name}")
+    async def crash_service(appid: int, service_name: str):
+        """Make a running service exit on its own, as seen by the engine events."""
+        appstate = find_app(appid)
+        if service_name not in appstate["services"]:
+            raise HTTPException(status_code=404, detail="Service not found")
+        appstate["services"][service_name]["status"] = "Exited"
+        emit_event(appstate, service_name, "Exited")
+        return JSONResponse(content="OK", status_code=200)
+
+    @app.post("/")
+    def main(payload: Dict[Any, Any]):
+        return payload
+
+    @app.get("/v2/applications/state")
+    async def get_applications_state():
+        """Mocking the /v2/applications/state endpoint of Balena Supervisor."""
+        return state
+
+    def is_applying() -> bool:
+        return any(
+            service["status"] not in ("Running", "Exited")
+            or service["downloadProgress"] is not None
+            for appstate in state.values()
+            for service in appstate["services"].values()
+        )
+
+    @app.get("/v1/device")
+    async def get_device():
+        """Mocking the /v1/device endpoint of Balena Supervisor."""
+        return {
+            "api_port": 48484,
+            "ip_address": "192.168.1.42 10.114.101.1",
+            "commit": next(iter(state.values()))["commit"],
+            "status": "Idle",
+            "download_progress": None,
+            "os_version": "balenaOS 6.0.24",
+            "supervisor_version": "16.7.5",
+            "update_pending": False,
+            "update_downloaded": False,
+            "update_failed": False,
+        }
+
+    @app.get("/v2/state/status")
+    async def get_state_status():
+        """Mocking the /v2/state/status endpoint of Balena Supervisor."""
+        return {
+            "status": "success",
+            "appState": "applying" if is_applying() else "applied",
+            "overallDownloadProgress": None,
+            "release": next(iter(state.values()))["commit"],
+        }
+
+    @app.get("/v2/version")
+    async def get_version():
+        """Mocking the /v2/version endpoint of Balena Supervisor."""
+        return {"status": "success", "version": "16.7.5"}
+
+    @app.post("/v2/journal-logs")
+    async def journal_logs(body: JournalLogsRequestBody):
+        """Mocking the /v2/journal-logs endpoint of Balena Supervisor, in json format."""
+
+        def entry(service_name: str, appstate: dict[str, Any], n: int) -> bytes:
+            service = appstate["services"][service_name]
+            return (
+                json.dumps(
+                    {
+                        "__REALTIME_TIMESTAMP": str(int(time.time() * 1_000_000)),
+                        "CONTAINER_NAME": f"{service_name}_1_{service['releaseId']}_{appstate['commit']}",
+                        "MESSAGE": f"{service_name} log line {n} ({service['status']})",
+                    }
+                ).encode()
+                + b"\n"
             )
 
-    elif action == "restart-service":
-        if current_status == "Running":
-            # Start a background task to transition: Running -> Exited -> Installing -> Running
-            delays = [random.uniform(0.5, 1.0), random.uniform(1.0, 2.5)]
-            asyncio.create_task(
-                transition_service_state(
-                    service_name, ["Exited", "Installing", "Running"], delays
+        async def lines():
+            n = 0
+            for _ in range(body.count or 10):
+                for appstate in state.values():
+                    for service_name in appstate["services"]:
+                        yield entry(service_name, appstate, n)
+                n += 1
+            while body.follow:
+                await asyncio.sleep(random.uniform(0.2, 1.0))
+                appstate = random.choice(list(state.values()))
+                yield entry(random.choice(list(appstate["services"])), appstate, n)
+                n += 1
+
+        return StreamingResponse(lines(), media_type="application/json")
+
+    async def transition_service_state(
+        appstate: dict[str, Any],
+        service_name: str,
+        state_sequence: list[str],
+        delays: list[float],
+    ):
+        """Transition a service through a sequence of states with delays."""
+        for i, next_state in enumerate(state_sequence):
+            if i > 0:  # Skip delay before first state change
+                await asyncio.sleep(delays[i - 1])
+            appstate["services"][service_name]["status"] = next_state
+            emit_event(appstate, service_name, next_state)
+            logger.info(f"[{name}] Service {service_name} transitioned to {next_state}")
+
+    def restart_all_services(appstate: dict[str, Any], purge: bool = False) -> None:
+        """Transition every service through a restart, or a purge and restart."""
+        sequence = ["Stopping", "Exited", "Installing", "Running"]
+        for service_name in appstate["services"]:
+            delays = [random.uniform(0.5, 1.5) for _ in range(len(sequence) - 1)]
+            if not purge:
+                # a restart skips stopping, like the per service restart-service
+                asyncio.create_task(
+                    transition_service_state(
+                        appstate, service_name, sequence[1:], delays[1:]
+                    )
                 )
-            )
-            return JSONResponse(content="OK", status_code=200)
-        else:
-            return JSONResponse(
-                content="Service not running or already in transition", status_code=200
-            )
+            else:
+                asyncio.create_task(
+                    transition_service_state(appstate, service_name, sequence, delays)
+                )
+
+    @app.post("/v1/restart")
+    async def v1_restart(body: V1RestartRequestBody):
+        """Mocking the legacy /v1/restart endpoint of Balena Supervisor."""
+        restart_all_services(find_app(body.appId))
+        return JSONResponse(content="OK", status_code=200)
+
+    @app.post("/v2/applications/{appid}/restart")
+    @app.post("/v2/applications/{appid}/purge")
+    async def control_whole_application(
+        appid: int, request: Request, body: ApplicationControlRequestBody | None = None
+    ):
+        """Mocking the /v2/applications/{appid}/restart and purge endpoints of Balena Supervisor."""
+        restart_all_services(
+            find_app(appid), purge=request.url.path.endswith("/purge")
+        )
+        return JSONResponse(content="OK", status_code=200)
+
+    @app.post("/v2/applications/{appid}/{action}")
+    async def control_application(
+        appid: int, action: str, body: ContainerControlRequestBody
+    ):
+        """Mocking the /v2/applications/{appid}/start-service, stop-service, restart-service endpoint of Balena Supervisor."""
+        appstate = find_app(appid)
+
+        if action not in ["start-service", "stop-service", "restart-service"]:
+            raise HTTPException(status_code=400, detail="Invalid action")
+
+        service_name = body.serviceName
+        if service_name not in appstate["services"]:
+            raise HTTPException(status_code=404, detail="Service not found")
+
+        current_status = appstate["services"][service_name]["status"]
 
-    return JSONResponse(content="OK", status_code=200)
+        if action == "start-service":
+            if current_status in ["Exited"]:
+                # Start a background task to transition: Exited/Stopped -> Installing -> Running
+                delays = [
+                    random.uniform(0.5, 2.0)
+                ]  # Random delay between Installing and Running
+                asyncio.create_task(
+                    transition_service_state(
+                        appstate, service_name, ["Installing", "Running"], delays
+                    )
+                )
+                return JSONResponse(content="OK", status_code=200)
+            else:
+                return JSONResponse(
+                    content="Service already running or in transition", status_code=200
+                )
+
+        elif action == "stop-service":
+            if current_status == "Running":
+                # Start a background task to transition: Running -> Stopping -> Exited -> Stopped
+                delays = [random.uniform(0.5, 1.5), random.uniform(0.5, 1.0)]
+                asyncio.create_task(
+                    transition_service_state(
+                        appstate, service_name, ["Stopping", "Exited"], delays
+                    )
+                )
+                return JSONResponse(content="OK", status_code=200)
+            else:
+                return JSONResponse(
+                    content="Service not running or already in transition",
+                    status_code=200,
+                )
+
+        elif action == "restart-service":
+            if current_status == "Running":
+                # Start a background task to transition: Running -> Exited -> Installing -> Running
+                delays = [random.uniform(0.5, 1.0), random.uniform(1.0, 2.5)]
+                asyncio.create_task(
+                    transition_service_state(
+                        appstate,
+                        service_name,
+                        ["Exited", "Installing", "Running"],
+                        delays,
+                    )
+                )
+                return JSONResponse(content="OK", status_code=200)
+            else:
+                return JSONResponse(
+                    content="Service not running or already in transition",
+                    status_code=200,
+                )
+
+        return JSONResponse(content="OK", status_code=200)
+
+    return app
+
+
+API_KEY = os.environ.get("BALENA_SUPERVISOR_API_KEY")  # checked when set
+
+app = create_app(api_key=API_KEY)
+
+
+async def serve_fleet(host: str, base_port: int, scenario: Scenario) -> None:
+    """Serve scenario.instances independent supervisors on consecutive ports."""
+    servers = [
+        uvicorn.Server(
+            uvicorn.Config(
+                create_app(name=f"device{i}", scenario=scenario, api_key=API_KEY),
+                host=host,
+                port=base_port + i,
+                log_level="warning",
+            )
+        )
+        for i in range(scenario.instances)
+    ]
+    logger.info(
+        "Serving %d supervisors on ports %d-%d",
+        scenario.instances,
+        base_port,
+        base_port + scenario.instances - 1,
+    )
+    await asyncio.gather(*(server.serve() for server in servers))
 
 
 if __name__ == "__main__":
     host = os.environ.get("MOCK_SUPERVISOR_HOST", "0.0.0.0")
     port = int(os.environ.get("BALENA_SUPERVISOR_PORT", "8080"))
-    auth_key = os.environ.get("BALENA_SUPERVISOR_API_KEY", "testkey")
-    uvicorn.run("mock_balena_supervisor:app", host=host, port=port, reload=True)
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--scenario", help="JSON scenario file")
+    parser.add_argument(
+        "--instances",
+        type=int,
+        help="number of supervisors to serve, on consecutive ports from the base port",
+    )
+    parser.add_argument("--apps", type=int, help="number of generated apps")
+    parser.add_argument("--services", type=int, help="number of services per app")
+    parser.add_argument("--log-sample-rate", type=float, help="fraction of requests logged")
+    args = parser.parse_args()
+
+    scenario = Scenario.from_file(args.scenario) if args.scenario else Scenario()
+    overrides = {
+        key: value
+        for key, value in (
+            ("instances", args.instances),
+            ("apps", args.apps),
+            ("services", args.services),
+            ("log_sample_rate", args.log_sample_rate),
+        )
+        if value is not None
+    }
+    if overrides.keys() & {"apps", "services"}:
+        overrides = {"apps": scenario.apps or 1, "services": scenario.services or 1, **overrides}
+    scenario = dataclasses.replace(scenario, **overrides)
+
+    if scenario == Scenario():
+        # the plain development mock, reloaded on changes
+        uvicorn.run("mock_balena_supervisor:app", host=host, port=port, reload=True)
+    else:
+        asyncio.run(serve_fleet(host, port, scenario))